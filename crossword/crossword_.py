@@ -104,30 +104,41 @@ class Crossword():
                             length=length
                         ))
 
+        # Index the variables through each cell, of which there are at most
+        # two, one across and one down
+        self.cells = dict()
+        for variable in self.variables:
+            for k, cell in enumerate(variable.cells):
+                self.cells.setdefault(cell, []).append((variable, k))
+
         # Compute overlaps for each word
         # For any pair of variables v1, v2, their overlap is either:
         #    None, if the two variables do not overlap; or
         #    (i, j), where v1's ith character overlaps v2's jth character
-        self.overlaps = dict()
-        for v1 in self.variables:
-            for v2 in self.variables:
-                if v1 == v2:
-                    continue
-                cells1 = v1.cells
-                cells2 = v2.cells
-                intersection = set(cells1).intersection(cells2)
-                if not intersection:
-                    self.overlaps[v1, v2] = None
-                else:
-                    intersection = intersection.pop()
-                    self.overlaps[v1, v2] = (
-                        cells1.index(intersection),
-                        cells2.index(intersection)
-                    )
+        # Only overlapping pairs are stored, and every other pair is None
+        self.overlaps = Overlaps()
+        self.adjacency = {variable: set() for variable in self.variables}
+        for crossing in self.cells.values():
+            if len(crossing) == 2:
+                (v1, i), (v2, j) = crossing
+                self.overlaps[v1, v2] = (i, j)
+                self.overlaps[v2, v1] = (j, i)
+                self.adjacency[v1].add(v2)
+                self.adjacency[v2].add(v1)
+        self.adjacency = {
+            variable: frozenset(neighbors)
+            for variable, neighbors in self.adjacency.items()
+        }
 
     def neighbors(self, var):
         """Given a variable, return set of overlapping variables."""
-        return set(
-            v for v in self.variables
-            if v != var and self.overlaps[v, var]
-        )
+        return self.adjacency[var]
+
+
+class Overlaps(dict):
+    """
+    Overlaps of pairs of variables, which are None for any pair not stored.
+    """
+
+    def __missing__(self, key):
+        return None
@@ -1,6 +1,6 @@
+import argparse
 from collections import deque
 from contextlib import nullcontext
-import sys
 import random
 
 from crossword_ import Crossword, Variable
@@ -163,7 +163,7 @@ class CrosswordCreator():
             # If we remove non arc-consistent values from x
             if self.revise(x,y):
                 # If nothing left in X's domain, return False. No solution possible
-                if len(self.domains[x]) == 0:
+                if not self.domains[x]:
                     return False
                 # Ensure arc consistency with values in changed domain
                 for z in self.crossword.neighbors(x):
@@ -237,7 +237,7 @@ class CrosswordCreator():
         return values.
         """
         # Add all unassigned variables to a dict along with # values in domain
-        numvals = {var: len(self.domains[var]) for var in self.domains if var not in assignment}
+        numvals = {var: self.domain_size(var) for var in self.domains if var not in assignment}
         # Sort dictionary by # values
         sorted_numvals = dict(sorted(numvals.items(), key=lambda item: item[1]))
         # Determine if multiple variables have the same min # values in domain
@@ -255,6 +255,12 @@ class CrosswordCreator():
             return maximum[0]
         return minimum[0]
 
+    def domain_size(self, var):
+        """
+        Return the number of values in the domain of `var`.
+        """
+        return len(self.domains[var])
+
     def backtrack(self, assignment):
         """
         Using Backtracking Search, take as input a partial assignment for the
@@ -284,29 +290,266 @@ class CrosswordCreator():
         # If no solution, return None
         return None
 
-def main():
 
-    # Check usage
-    if len(sys.argv) not in [3, 4]:
-        sys.exit("Usage: python generate.py structure words [output]")
+class BitsetCrosswordCreator(CrosswordCreator):
+    """
+    Solves the same CSP as CrosswordCreator, but stores each domain as a
+    bitset: an int whose bit k is set if `self.words[k]` is in the domain.
+    Removing words, intersecting and copying domains, and checking whether
+    one is empty are then single operations on ints, however many words
+    the vocabulary has.
+    """
+
+    def __init__(self, crossword, inference="mac"):
+        """
+        Create new CSP crossword generate with bitset domains, inferring
+        what each assignment rules out during search with `inference`:
+        "mac", "forward" or None.
+        """
+        self.crossword = crossword
+        self.inference = inference
+
+        # Domains replaced since the search began, with their old values,
+        # and the number of values the search has tried
+        self.trail = []
+        self.nodes = 0
+
+        # Words of the same length have consecutive bits
+        self.words = sorted(crossword.words, key=lambda word: (len(word), word))
+        self.positions = {word: k for k, word in enumerate(self.words)}
+        self.lengths = {}
+        for k, word in enumerate(self.words):
+            start, _ = self.lengths.get(len(word), (k, k))
+            self.lengths[len(word)] = (start, k + 1)
+
+        # Words of each length with each letter at each position
+        positions = {}
+        for k, word in enumerate(self.words):
+            for position, letter in enumerate(word):
+                positions.setdefault((len(word), position, letter), []).append(k)
+        self.index = {key: bitset(ks) for key, ks in positions.items()}
+        self.letters = {}
+        for length, position, letter in sorted(self.index):
+            self.letters.setdefault((length, position), []).append(letter)
+
+        everything = (1 << len(self.words)) - 1
+        self.domains = {var: everything for var in self.crossword.variables}
+
+    def values(self, var):
+        """
+        Return the words in the domain of `var`.
+        """
+        return [self.words[k] for k in members(self.domains[var])]
+
+    def domain_size(self, var):
+        """
+        Return the number of values in the domain of `var`.
+        """
+        return self.domains[var].bit_count()
+
+    def enforce_node_consistency(self):
+        """
+        Update `self.domains` such that each variable only has words of
+        its length.
+        """
+        for var in self.domains:
+            start, end = self.lengths.get(var.length, (0, 0))
+            self.domains[var] &= (1 << end) - (1 << start)
+
+    def revise(self, x, y):
+        """
+        Make variable `x` arc consistent with variable `y`, as in
+        CrosswordCreator.revise, and return True if the domain of `x` changed.
+
+        Rather than comparing every pair of words, asks the index for each
+        letter whether any word for `y` has it where the variables overlap,
+        and if so keeps every word for `x` with that letter there.
+        """
+        overlap = self.crossword.overlaps[x, y]
+        if not overlap:
+            return False
+        i, j = overlap
+
+        supported = 0
+        for letter in self.letters.get((y.length, j), []):
+            ys = self.domains[y] & self.index[y.length, j, letter]
+            if not ys:
+                continue
+            xs = self.domains[x] & self.index.get((x.length, i, letter), 0)
+
+            # A word cannot be the only support for itself
+            if ys & (ys - 1) == 0:
+                xs &= ~ys
+            supported |= xs
+
+        return self.restrict(x, supported)
+
+    def order_domain_values(self, var, assignment):
+        """
+        Return the words in the domain of `var` ordered by the number of
+        values they rule out for neighboring variables, as in
+        CrosswordCreator.order_domain_values, counting the words a value
+        leaves a neighbor from the size of its domain and the index.
+        """
+        neighbors = [
+            (neighbor, self.crossword.overlaps[var, neighbor])
+            for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        ]
+
+        # Number of words each neighbor keeps for each letter
+        kept = {}
+
+        def eliminated(value):
+            total = 0
+            for neighbor, (x, y) in neighbors:
+                key = (neighbor.length, y, value[x])
+                if (neighbor, key) not in kept:
+                    kept[neighbor, key] = (
+                        self.domains[neighbor] & self.index.get(key, 0)
+                    ).bit_count()
+                total += self.domain_size(neighbor) - kept[neighbor, key]
+            return total
+
+        return sorted(self.values(var), key=eliminated)
+
+    def restrict(self, var, domain):
+        """
+        Replace the domain of `var` with `domain`, recording the old one on
+        the trail, and return True if it changed.
+        """
+        if domain == self.domains[var]:
+            return False
+        self.trail.append((var, self.domains[var]))
+        self.domains[var] = domain
+        return True
+
+    def undo(self, mark):
+        """
+        Restore every domain replaced since the trail was `mark` long.
+        """
+        while len(self.trail) > mark:
+            var, domain = self.trail.pop()
+            self.domains[var] = domain
+
+    def infer(self, var, assignment):
+        """
+        Narrow the domains of the other variables given the word just
+        assigned to `var`, and return False if that leaves one empty.
+
+        Forward checking revises each unassigned neighbor against `var`.
+        MAC does the same with ac3, so any domain that shrinks goes on to
+        revise its own neighbors. Without inference, only checks that the
+        assignment is consistent.
+        """
+        if self.inference is None:
+            return self.consistent(assignment)
+
+        self.restrict(var, 1 << self.positions[assignment[var]])
+        arcs = [
+            (neighbor, var) for neighbor in self.crossword.neighbors(var)
+            if neighbor not in assignment
+        ]
+        if self.inference == "forward":
+            for x, y in arcs:
+                self.revise(x, y)
+                if not self.domains[x]:
+                    return False
+            return True
+        return not arcs or self.ac3(arcs)
+
+    def backtrack(self, assignment):
+        """
+        Using Backtracking Search, as in CrosswordCreator.backtrack, return
+        a complete assignment extending `assignment` if possible, or None.
+
+        After each assignment, `infer` narrows the other domains, and every
+        domain it changed is restored from the trail before the next value
+        is tried, so undoing an assignment costs as much as it changed.
+        """
+        if self.assignment_complete(assignment):
+            return assignment
+        var = self.select_unassigned_variable(assignment)
+        used = set(assignment.values())
+        for value in self.order_domain_values(var, assignment):
+            if value in used:
+                continue
+            self.nodes += 1
+            mark = len(self.trail)
+            assignment[var] = value
+            if self.infer(var, assignment):
+                result = self.backtrack(assignment)
+                if result:
+                    return result
+            self.undo(mark)
+            del assignment[var]
+        return None
+
+
+def bitset(positions):
+    """
+    Return the int with the bits at each of `positions` set.
+    """
+    if not positions:
+        return 0
+    bits = bytearray(max(positions) // 8 + 1)
+    for k in positions:
+        bits[k >> 3] |= 1 << (k & 7)
+    return int.from_bytes(bits, "little")
+
 
-    # Parse command-line arguments
-    structure = sys.argv[1]
-    words = sys.argv[2]
-    output = sys.argv[3] if len(sys.argv) == 4 else None
+def members(bitset):
+    """
+    Return the position of every set bit in `bitset`, in increasing order.
+    """
+    bits = bin(bitset)[:1:-1]
+    positions = []
+    k = bits.find("1")
+    while k >= 0:
+        positions.append(k)
+        k = bits.find("1", k + 1)
+    return positions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a crossword.")
+    parser.add_argument("structure", help="file of the crossword's structure")
+    parser.add_argument("words", help="file of words, one per line")
+    parser.add_argument("output", nargs="?", help="save the crossword as an image")
+    # Only the bitset search counts the values it tries
+    search = parser.add_mutually_exclusive_group()
+    search.add_argument(
+        "--sets", action="store_true",
+        help="store domains as sets of words rather than bitsets"
+    )
+    search.add_argument(
+        "--nodes", action="store_true",
+        help="print how many values the bitset search tried"
+    )
+    parser.add_argument(
+        "--inference", choices=["mac", "forward", "none"], default="mac",
+        help="what to infer after each assignment with bitsets (default: mac)"
+    )
+    args = parser.parse_args()
 
     # Generate crossword
-    crossword = Crossword(structure, words)
-    creator = CrosswordCreator(crossword)
+    crossword = Crossword(args.structure, args.words)
+    if args.sets:
+        creator = CrosswordCreator(crossword)
+    else:
+        inference = None if args.inference == "none" else args.inference
+        creator = BitsetCrosswordCreator(crossword, inference)
     assignment = creator.solve()
+    if args.nodes:
+        print(f"{creator.nodes} nodes searched")
 
     # Print result
     if assignment is None:
         print("No solution.")
     else:
         creator.print(assignment)
-        if output:
-            creator.save(assignment, output)
+        if args.output:
+            creator.save(assignment, args.output)
 
 
 if __name__ == "__main__":
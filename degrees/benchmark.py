@@ -0,0 +1,105 @@
+import argparse
+import random
+import time
+from array import array
+
+from util import (
+    Node, StackFrontier, QueueFrontier, DequeStackFrontier, DequeQueueFrontier
+)
+
+FRONTIERS = [StackFrontier, QueueFrontier, DequeStackFrontier, DequeQueueFrontier]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare frontier implementations on a synthetic graph."
+    )
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--degree", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--time-limit", type=float, default=30,
+        help="seconds before giving up on a single search"
+    )
+    args = parser.parse_args()
+
+    print(f"Building graph with {args.nodes} nodes...")
+    offsets, edges = synthetic_graph(args.nodes, args.degree, args.seed)
+    print("Graph built.")
+
+    for frontier_class in FRONTIERS:
+        explored, seconds, finished = search(
+            offsets, edges, frontier_class, args.time_limit
+        )
+        status = "done" if finished else "timed out"
+        print(
+            f"{frontier_class.__name__:>20}: {explored} nodes in "
+            f"{seconds:.2f}s ({explored / seconds:,.0f} nodes/s, {status})"
+        )
+
+
+def synthetic_graph(n, degree, seed):
+    """
+    Return a random undirected graph on `n` nodes as a pair of arrays
+    (offsets, edges), where the neighbors of node i are
+    edges[offsets[i]:offsets[i + 1]].
+    """
+    rng = random.Random(seed)
+
+    # Link every node to a random earlier node so the graph is connected,
+    # then add random edges until the average degree is reached
+    pairs = [(i, rng.randrange(i)) for i in range(1, n)]
+    pairs += [
+        (rng.randrange(n), rng.randrange(n))
+        for _ in range(n * degree // 2 - len(pairs))
+    ]
+
+    counts = array("l", [0]) * (n + 1)
+    for a, b in pairs:
+        counts[a + 1] += 1
+        counts[b + 1] += 1
+    for i in range(n):
+        counts[i + 1] += counts[i]
+    offsets = counts
+
+    edges = array("l", [0]) * offsets[n]
+    position = array("l", offsets)
+    for a, b in pairs:
+        edges[position[a]] = b
+        position[a] += 1
+        edges[position[b]] = a
+        position[b] += 1
+
+    return offsets, edges
+
+
+def search(offsets, edges, frontier_class, time_limit):
+    """
+    Explore the whole graph from node 0 the way `shortest_path` does,
+    using `frontier_class` as the frontier.
+
+    Return the number of nodes explored, the seconds taken, and whether
+    the search finished within `time_limit` seconds.
+    """
+    start = time.perf_counter()
+    frontier = frontier_class()
+    frontier.add(Node(state=0, parent=None, action=None))
+    explored_set = set()
+
+    while not frontier.empty():
+        node = frontier.remove()
+        explored_set.add(node.state)
+
+        if time.perf_counter() - start > time_limit:
+            return len(explored_set), time.perf_counter() - start, False
+
+        for i in range(offsets[node.state], offsets[node.state + 1]):
+            state = edges[i]
+            if not frontier.contains_state(state) and state not in explored_set:
+                frontier.add(Node(state=state, parent=node, action=None))
+
+    return len(explored_set), time.perf_counter() - start, True
+
+
+if __name__ == "__main__":
+    main()
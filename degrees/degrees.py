@@ -1,7 +1,16 @@
+import argparse
 import csv
+import heapq
+import os
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import MoviesView, NamesView, PeopleView, load_graph, read_rows
+from graph import apply_delta as apply_graph_delta
+from index import PathIndex
+from nameindex import NameIndex
+from service import run_batch, serve
+from snapshot import SnapshotGraph
+from util import Node, DequeQueueFrontier, bidirectional_search
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +21,27 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, if loaded with compact=True
+graph = None
 
-def load_data(directory):
+# Cached BFS trees and landmark distances, if enabled with build_index
+index = None
+
+# Prefix and typo-tolerant index of people's names, built when first needed
+name_index = None
+
+
+def load_data(directory, compact=False):
     """
     Load data from CSV files into memory.
+
+    If `compact` is True, load them into a CompactGraph instead and make
+    `names`, `people` and `movies` read-only views of it.
     """
+    if compact:
+        use_graph(load_graph(directory))
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -45,22 +70,152 @@ def load_data(directory):
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
+            # Skip stars whose person or movie is unknown, leaving neither
+            # side half-linked so later deltas can add the star properly
+            if row["person_id"] in people and row["movie_id"] in movies:
                 people[row["person_id"]]["movies"].add(row["movie_id"])
                 movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+
+
+def apply_delta(directory):
+    """
+    Add the people, movies and stars in the CSV files of `directory` to the
+    loaded data without reloading it, and update the cached searches that
+    the new stars affect. Each file is optional.
+
+    Returns the number of movies that gained stars.
+    """
+    if graph is not None:
+        num_people = graph.num_people
+        changed = apply_graph_delta(graph, directory)
+        groups = [graph.stars_of(j) for j in changed]
+        if name_index is not None:
+            for i in range(num_people, graph.num_people):
+                name_index.add(graph.person_record(i)[1])
+    else:
+        for row in read_rows(directory, "people.csv"):
+            if row["id"] not in people:
+                people[row["id"]] = {
+                    "name": row["name"],
+                    "birth": row["birth"],
+                    "movies": set()
+                }
+                names.setdefault(row["name"].lower(), set()).add(row["id"])
+                if name_index is not None:
+                    name_index.add(row["name"])
+        for row in read_rows(directory, "movies.csv"):
+            if row["id"] not in movies:
+                movies[row["id"]] = {
+                    "title": row["title"],
+                    "year": row["year"],
+                    "stars": set()
+                }
+        changed = set()
+        for row in read_rows(directory, "stars.csv"):
+            person = people.get(row["person_id"])
+            movie = movies.get(row["movie_id"])
+            if person and movie and row["movie_id"] not in person["movies"]:
+                person["movies"].add(row["movie_id"])
+                movie["stars"].add(row["person_id"])
+                changed.add(row["movie_id"])
+        groups = [movies[movie_id]["stars"] for movie_id in changed]
+
+    if index is not None:
+        index.update(groups, size=None if graph is None else graph.num_people)
+    return len(changed)
+
+
+def use_graph(compact_graph):
+    """
+    Answer all queries from `compact_graph`.
+    """
+    global graph, names, people, movies
+    graph = compact_graph
+    names = NamesView(graph)
+    people = PeopleView(graph)
+    movies = MoviesView(graph)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two actors."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument(
+        "--compact", action="store_true",
+        help="load the data into a compact integer-indexed graph"
+    )
+    parser.add_argument(
+        "--snapshot", metavar="FILE",
+        help="map a snapshot written by snapshot.py instead of loading CSVs"
+    )
+    parser.add_argument(
+        "--batch", metavar="FILE",
+        help="answer pairs of names from FILE ('-' for stdin) as JSON lines"
+    )
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="write batch results to FILE instead of stdout"
+    )
+    parser.add_argument(
+        "--serve", metavar="ADDRESS",
+        help="answer queries over HTTP on HOST:PORT or a Unix socket path"
+    )
+    parser.add_argument(
+        "--delta", metavar="DIR", action="append", default=[],
+        help="add the people, movies and stars in DIR after loading"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=0, metavar="N",
+        help="keep the BFS trees of the N most recent sources"
+    )
+    parser.add_argument(
+        "--landmarks", type=int, default=0, metavar="K",
+        help="precompute distances from the K people with the most movies"
+    )
+    parser.add_argument(
+        "--suggest", action="store_true",
+        help="suggest similar names for unknown batch or server queries"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of processes answering batch or server queries"
+    )
+    args = parser.parse_args()
+
+    # Keep stdout for results in batch mode
+    log = sys.stderr if args.batch else sys.stdout
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=log)
+    if args.snapshot:
+        use_graph(SnapshotGraph(args.snapshot))
+    else:
+        load_data(args.directory, compact=args.compact)
+    for delta in args.delta:
+        apply_delta(delta)
+    if args.cache_size or args.landmarks:
+        build_index(args.cache_size, args.landmarks)
+
+    # Build the name index before forking workers so they share it
+    if args.suggest and (args.batch or args.serve):
+        build_name_index()
+    print("Data loaded.", file=log)
+
+    if args.batch:
+        lines = sys.stdin if args.batch == "-" else open(args.batch, encoding="utf-8")
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        try:
+            run_batch(lines, output, answer, args.workers)
+        finally:
+            for f in [lines, output]:
+                if f not in [sys.stdin, sys.stdout]:
+                    f.close()
+        return
+    if args.serve:
+        serve(args.serve, answer, args.workers, update=apply_delta,
+              complete=complete_name)
+        return
 
     source, target = None, None
     while source is None:
@@ -72,7 +227,7 @@ def main():
         if target is None:
             print("Person not found. Please try again")
 
-    path = shortest_path(source, target)
+    path = bidirectional_shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -102,7 +257,7 @@ def shortest_path(source, target):
 
     # Initialize frontier to just the starting position
     start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(start)
 
     # Initialize an empty explored set
@@ -151,6 +306,152 @@ def shortest_path(source, target):
                 # If node is not the goal, add to frontier and continue
                 frontier.add(child)
 
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outwards from
+    both people at once and always expanding the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    if graph is None:
+        return search(source, target)
+    path = search(graph.index_of_person(source), graph.index_of_person(target))
+    return graph.translate_path(path)
+
+
+def degrees_of_separation(source, target):
+    """
+    Returns the number of movies needed to connect the source
+    to the target, or None if they are not connected.
+    """
+    if graph is not None:
+        source, target = graph.index_of_person(source), graph.index_of_person(target)
+    if index is not None:
+        return index.distance(source, target)
+    path = search(source, target)
+    return None if path is None else len(path)
+
+
+def search(source, target):
+    """
+    Returns the shortest path between two people of the loaded graph,
+    given as person_ids or, for a compact graph, person indices.
+    """
+    if index is not None:
+        return index.shortest_path(source, target)
+    return bidirectional_search(source, target, graph_neighbors())
+
+
+def graph_neighbors():
+    """
+    Returns the neighbors function of the loaded graph.
+    """
+    return neighbors_for_person if graph is None else graph.neighbors
+
+
+def build_index(cache_size=0, num_landmarks=0):
+    """
+    Reuse work between queries: cache the BFS trees of the `cache_size`
+    most recent sources, and precompute distances from the
+    `num_landmarks` people who starred in the most movies.
+    """
+    global index
+    if graph is None:
+        candidates = people
+        size = None
+    else:
+        candidates = range(graph.num_people)
+        size = graph.num_people
+    landmarks = heapq.nlargest(num_landmarks, candidates, key=movie_count)
+    index = PathIndex(graph_neighbors(), cache_size, landmarks, size)
+
+
+def build_name_index():
+    """
+    Index the names of all loaded people for prefix and fuzzy lookup.
+    """
+    global name_index
+    if graph is None:
+        name_index = NameIndex(person["name"] for person in people.values())
+    else:
+        name_index = NameIndex(
+            graph.person_record(i)[1] for i in range(graph.num_people)
+        )
+
+
+def similar_names(name, limit=10):
+    """
+    Returns up to `limit` known names that start with or are a few typos
+    away from `name`, building the name index on first use.
+    """
+    if name_index is None:
+        build_name_index()
+    return name_index.lookup(name, limit)
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` known names starting with `prefix`,
+    or similar names if there are none.
+    """
+    if name_index is None:
+        build_name_index()
+    return name_index.prefix(prefix, limit) or similar_names(prefix, limit)
+
+
+def movie_count(person):
+    """
+    Returns how many movies a person, given by person_id or, for a compact
+    graph, person index, starred in.
+    """
+    if graph is None:
+        return len(people[person]["movies"])
+    return graph.movie_count(person)
+
+
+def answer(name1, name2):
+    """
+    Returns a dictionary, ready to be written as JSON, describing how the
+    people named `name1` and `name2` are connected.
+
+    Never prompts for input: if a name is unknown or ambiguous, the result
+    has an "error" and the matching "candidates" instead of a path. If the
+    name index is built, an unknown name also gets "suggestions".
+    """
+    result = {"source": name1, "target": name2}
+    person_ids = []
+    for field, name in [("source", name1), ("target", name2)]:
+        candidates = sorted(names.get(name.lower(), set()))
+        if len(candidates) != 1:
+            problem = "not found" if not candidates else "ambiguous"
+            result["error"] = f"{field} {problem}"
+            result["candidates"] = [
+                {"id": person_id, "name": people[person_id]["name"],
+                 "birth": people[person_id]["birth"]}
+                for person_id in candidates
+            ]
+            if not candidates and name_index is not None:
+                result["suggestions"] = name_index.lookup(name)
+            return result
+        person_ids.append(candidates[0])
+
+    path = bidirectional_shortest_path(*person_ids)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = [
+        {"movie_id": movie_id, "movie": movies[movie_id]["title"],
+         "person_id": person_id, "person": people[person_id]["name"]}
+        for movie_id, person_id in path
+    ]
+    return result
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -158,6 +459,9 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = similar_names(name, 5)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
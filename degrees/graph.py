@@ -0,0 +1,502 @@
+import bisect
+import csv
+import os
+from array import array
+from collections.abc import Mapping
+
+from util import bidirectional_search
+
+
+class CompactGraph():
+    """
+    Co-star graph with people and movies interned to dense integers.
+
+    Person i starred in movies person_movies[person_offsets[i]:person_offsets[i + 1]]
+    and movie j starred people movie_stars[movie_offsets[j]:movie_offsets[j + 1]],
+    so the adjacency lives in four flat arrays instead of one set per record.
+
+    People, movies and stars added after the graph is built with `add_person`,
+    `add_movie` and `add_star` are kept in small overlays on top of the arrays.
+    """
+
+    def __init__(self, people, movies, stars):
+        """
+        Create a graph from a list of (id, name, birth) people, a list of
+        (id, title, year) movies and a collection of (person index,
+        movie index) star pairs.
+
+        Strings are packed into string tables, and people and movies are
+        found by binary search over indices sorted by id and name, laid out
+        as in a snapshot, rather than kept as Python strings and dicts.
+        """
+        for field, column in [("id", 0), ("name", 1), ("birth", 2)]:
+            offsets, data = string_table(person[column] for person in people)
+            setattr(self, f"person_{field}_offsets", offsets)
+            setattr(self, f"person_{field}_data", data)
+        for field, column in [("id", 0), ("title", 1), ("year", 2)]:
+            offsets, data = string_table(movie[column] for movie in movies)
+            setattr(self, f"movie_{field}_offsets", offsets)
+            setattr(self, f"movie_{field}_data", data)
+
+        self.people_by_id = array(
+            "q", sorted(range(len(people)), key=lambda i: people[i][0])
+        )
+        self.movies_by_id = array(
+            "q", sorted(range(len(movies)), key=lambda j: movies[j][0])
+        )
+        self.people_by_name = array(
+            "q", sorted(range(len(people)), key=lambda i: people[i][1].lower())
+        )
+
+        star_people = array("q", [i for i, _ in stars])
+        star_movies = array("q", [j for _, j in stars])
+        self.person_offsets, self.person_movies = adjacency(
+            len(people), star_people, star_movies
+        )
+        self.movie_offsets, self.movie_stars = adjacency(
+            len(movies), star_movies, star_people
+        )
+        self.clear_overlays()
+
+    def clear_overlays(self):
+        """
+        Start with no people, movies or stars added since the graph was built.
+        """
+        self.stored_people = len(self.person_offsets) - 1
+        self.stored_movies = len(self.movie_offsets) - 1
+        self.added_people = []
+        self.added_movies = []
+        self.added_person_index = {}
+        self.added_movie_index = {}
+        self.added_names = {}
+        self.added_person_movies = {}
+        self.added_movie_stars = {}
+        self.added_stars = set()
+
+    @property
+    def num_people(self):
+        return self.stored_people + len(self.added_people)
+
+    @property
+    def num_movies(self):
+        return self.stored_movies + len(self.added_movies)
+
+    def person_id(self, i):
+        if i >= self.stored_people:
+            return self.added_people[i - self.stored_people][0]
+        return self.stored_person_id(i)
+
+    def movie_id(self, j):
+        if j >= self.stored_movies:
+            return self.added_movies[j - self.stored_movies][0]
+        return self.stored_movie_id(j)
+
+    def person_record(self, i):
+        """Return the (id, name, birth) of person `i`."""
+        if i >= self.stored_people:
+            return self.added_people[i - self.stored_people]
+        return self.stored_person_record(i)
+
+    def movie_record(self, j):
+        """Return the (id, title, year) of movie `j`."""
+        if j >= self.stored_movies:
+            return self.added_movies[j - self.stored_movies]
+        return self.stored_movie_record(j)
+
+    def find_person(self, person_id):
+        """Return the index of the person with IMDb id `person_id`, or None."""
+        i = self.stored_find_person(person_id)
+        if i is None:
+            i = self.added_person_index.get(person_id)
+        return i
+
+    def index_of_person(self, person_id):
+        """Return the index of person `person_id`, raising KeyError if unknown."""
+        i = self.find_person(person_id)
+        if i is None:
+            raise KeyError(person_id)
+        return i
+
+    def find_movie(self, movie_id):
+        """Return the index of the movie with IMDb id `movie_id`, or None."""
+        j = self.stored_find_movie(movie_id)
+        if j is None:
+            j = self.added_movie_index.get(movie_id)
+        return j
+
+    def people_named(self, name):
+        """Return the indices of people whose lowercase name is `name`."""
+        return self.stored_people_named(name) + self.added_names.get(name, [])
+
+    def all_names(self):
+        """Return an iterable over every distinct lowercase name."""
+        for name in self.stored_all_names():
+            yield name
+        for name in self.added_names:
+            if not self.stored_people_named(name):
+                yield name
+
+    def movies_of(self, i):
+        """Return the indices of movies that person `i` starred in."""
+        movies = array("q")
+        if i < self.stored_people:
+            movies.extend(self.person_movies[
+                self.person_offsets[i]:self.person_offsets[i + 1]
+            ])
+        movies.extend(self.added_person_movies.get(i, []))
+        return movies
+
+    def stars_of(self, j):
+        """Return the indices of people who starred in movie `j`."""
+        stars = array("q")
+        if j < self.stored_movies:
+            stars.extend(self.movie_stars[
+                self.movie_offsets[j]:self.movie_offsets[j + 1]
+            ])
+        stars.extend(self.added_movie_stars.get(j, []))
+        return stars
+
+    def movie_count(self, i):
+        """Return how many movies person `i` starred in."""
+        count = len(self.added_person_movies.get(i, ()))
+        if i < self.stored_people:
+            count += self.person_offsets[i + 1] - self.person_offsets[i]
+        return count
+
+    def neighbors(self, i):
+        """
+        Yield (movie index, person index) pairs for people
+        who starred with person `i`.
+
+        Stars added since the graph was built are only looked up for the
+        person and movies that have some, so people untouched by a delta
+        are expanded straight from the arrays.
+        """
+        person_movies = self.person_movies
+        movie_offsets = self.movie_offsets
+        movie_stars = self.movie_stars
+        stored_movies = self.stored_movies
+        added_stars = self.added_movie_stars
+
+        start = end = 0
+        if i < self.stored_people:
+            start, end = self.person_offsets[i], self.person_offsets[i + 1]
+        added_movies = self.added_person_movies.get(i, ())
+        for k in range(start, end + len(added_movies)):
+            j = person_movies[k] if k < end else added_movies[k - end]
+            if j < stored_movies:
+                for l in range(movie_offsets[j], movie_offsets[j + 1]):
+                    yield j, movie_stars[l]
+            if j in added_stars:
+                for neighbor in added_stars[j]:
+                    yield j, neighbor
+
+    def add_person(self, person_id, name, birth):
+        """
+        Add a person to the graph, returning their index, or None if
+        a person with IMDb id `person_id` is already in the graph.
+        """
+        if self.find_person(person_id) is not None:
+            return None
+        i = self.num_people
+        self.added_people.append((person_id, name, birth))
+        self.added_person_index[person_id] = i
+        self.added_names.setdefault(name.lower(), []).append(i)
+        return i
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Add a movie to the graph, returning its index, or None if
+        a movie with IMDb id `movie_id` is already in the graph.
+        """
+        if self.find_movie(movie_id) is not None:
+            return None
+        j = self.num_movies
+        self.added_movies.append((movie_id, title, year))
+        self.added_movie_index[movie_id] = j
+        return j
+
+    def add_star(self, i, j):
+        """
+        Record that person `i` starred in movie `j`. Returns False if
+        this was already known, and True otherwise.
+        """
+        if (i, j) in self.added_stars:
+            return False
+        if i < self.stored_people:
+            start, end = self.person_offsets[i], self.person_offsets[i + 1]
+            if j in self.person_movies[start:end]:
+                return False
+        self.added_stars.add((i, j))
+        self.added_person_movies.setdefault(i, []).append(j)
+        self.added_movie_stars.setdefault(j, []).append(i)
+        return True
+
+    def stored_person_id(self, i):
+        return decode(self.person_id_offsets, self.person_id_data, i)
+
+    def stored_movie_id(self, j):
+        return decode(self.movie_id_offsets, self.movie_id_data, j)
+
+    def stored_person_record(self, i):
+        return (
+            self.stored_person_id(i),
+            self.person_name(i),
+            decode(self.person_birth_offsets, self.person_birth_data, i)
+        )
+
+    def stored_movie_record(self, j):
+        return (
+            self.stored_movie_id(j),
+            decode(self.movie_title_offsets, self.movie_title_data, j),
+            decode(self.movie_year_offsets, self.movie_year_data, j)
+        )
+
+    def person_name(self, i):
+        return decode(self.person_name_offsets, self.person_name_data, i)
+
+    def stored_find_person(self, person_id):
+        key = self.stored_person_id
+        k = bisect.bisect_left(self.people_by_id, person_id, key=key)
+        if k < len(self.people_by_id) and key(self.people_by_id[k]) == person_id:
+            return self.people_by_id[k]
+        return None
+
+    def stored_find_movie(self, movie_id):
+        key = self.stored_movie_id
+        k = bisect.bisect_left(self.movies_by_id, movie_id, key=key)
+        if k < len(self.movies_by_id) and key(self.movies_by_id[k]) == movie_id:
+            return self.movies_by_id[k]
+        return None
+
+    def stored_people_named(self, name):
+        key = self.lowercase_name
+        start = bisect.bisect_left(self.people_by_name, name, key=key)
+        end = bisect.bisect_right(self.people_by_name, name, lo=start, key=key)
+        return list(self.people_by_name[start:end])
+
+    def stored_all_names(self):
+        previous = None
+        for i in self.people_by_name:
+            name = self.lowercase_name(i)
+            if name != previous:
+                yield name
+                previous = name
+
+    def lowercase_name(self, i):
+        return self.person_name(i).lower()
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given as IMDb ids.
+
+        The search runs over person indices from both ends at once and only
+        translates back to IMDb ids for the path it returns.
+        If no possible path, returns None.
+        """
+        path = bidirectional_search(
+            self.index_of_person(source), self.index_of_person(target),
+            self.neighbors
+        )
+        return self.translate_path(path)
+
+    def translate_path(self, path):
+        """
+        Returns a list of (movie index, person index) pairs as
+        (movie_id, person_id) pairs, passing None through.
+        """
+        if path is None:
+            return None
+        return [(self.movie_id(j), self.person_id(i)) for j, i in path]
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like `degrees.people`,
+    mapping person_ids to a dictionary of: name, birth, movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        i = self.graph.index_of_person(person_id)
+        _, name, birth = self.graph.person_record(i)
+        return {
+            "name": name,
+            "birth": birth,
+            "movies": {
+                self.graph.movie_id(j) for j in self.graph.movies_of(i)
+            }
+        }
+
+    def __iter__(self):
+        for i in range(self.graph.num_people):
+            yield self.graph.person_id(i)
+
+    def __len__(self):
+        return self.graph.num_people
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like `degrees.movies`,
+    mapping movie_ids to a dictionary of: title, year, stars.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        j = self.graph.find_movie(movie_id)
+        if j is None:
+            raise KeyError(movie_id)
+        _, title, year = self.graph.movie_record(j)
+        return {
+            "title": title,
+            "year": year,
+            "stars": {
+                self.graph.person_id(i) for i in self.graph.stars_of(j)
+            }
+        }
+
+    def __iter__(self):
+        for j in range(self.graph.num_movies):
+            yield self.graph.movie_id(j)
+
+    def __len__(self):
+        return self.graph.num_movies
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a CompactGraph shaped like `degrees.names`,
+    mapping lowercase names to a set of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        indices = self.graph.people_named(name)
+        if not indices:
+            raise KeyError(name)
+        return {self.graph.person_id(i) for i in indices}
+
+    def __iter__(self):
+        return iter(self.graph.all_names())
+
+    def __len__(self):
+        return sum(1 for _ in self.graph.all_names())
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a CompactGraph.
+    """
+    people = []
+    person_index = {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person_index[row["id"]] = len(people)
+            people.append((row["id"], row["name"], row["birth"]))
+
+    movies = []
+    movie_index = {}
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            movie_index[row["id"]] = len(movies)
+            movies.append((row["id"], row["title"], row["year"]))
+
+    # Skip stars that refer to unknown people or movies, like load_data does
+    stars = set()
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            i = person_index.get(row["person_id"])
+            j = movie_index.get(row["movie_id"])
+            if i is not None and j is not None:
+                stars.add((i, j))
+
+    return CompactGraph(people, movies, stars)
+
+
+def apply_delta(graph, directory):
+    """
+    Add the people, movies and stars in the CSV files of `directory` to
+    `graph`. Each file is optional and has the same columns as the files
+    read by `load_graph`; rows already in the graph are skipped.
+
+    Returns the set of indices of movies that gained stars.
+    """
+    changed = set()
+    for filename, columns, add in [
+        ("people.csv", ["id", "name", "birth"], graph.add_person),
+        ("movies.csv", ["id", "title", "year"], graph.add_movie)
+    ]:
+        for row in read_rows(directory, filename):
+            add(*(row[column] for column in columns))
+
+    for row in read_rows(directory, "stars.csv"):
+        i = graph.find_person(row["person_id"])
+        j = graph.find_movie(row["movie_id"])
+        if i is not None and j is not None and graph.add_star(i, j):
+            changed.add(j)
+    return changed
+
+
+def read_rows(directory, filename):
+    """
+    Yield the rows of CSV file `filename` in `directory`, if it exists.
+    """
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"no such directory: {directory}")
+    path = os.path.join(directory, filename)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def string_table(strings):
+    """
+    Return (offsets, data) for an iterable of strings, where string i is
+    data[offsets[i]:offsets[i + 1]] decoded as UTF-8.
+    """
+    data = bytearray()
+    offsets = array("q", [0])
+    for string in strings:
+        data += string.encode("utf-8")
+        offsets.append(len(data))
+    return offsets, bytes(data)
+
+
+def decode(offsets, data, i):
+    """
+    Return string `i` of a string table.
+    """
+    return str(data[offsets[i]:offsets[i + 1]], "utf-8")
+
+
+def adjacency(n, sources, targets):
+    """
+    Build CSR adjacency arrays (offsets, neighbors) for `n` nodes
+    from parallel arrays of edge sources and targets.
+    """
+    offsets = array("q", [0]) * (n + 1)
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    neighbors = array("q", [0]) * offsets[n]
+    position = offsets[:-1]
+    for source, target in zip(sources, targets):
+        neighbors[position[source]] = target
+        position[source] += 1
+
+    return offsets, neighbors
+
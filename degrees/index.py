@@ -0,0 +1,238 @@
+import math
+from array import array
+from collections import OrderedDict
+
+from util import bidirectional_search
+
+
+class PathIndex():
+    """
+    Answers shortest path and distance queries over a graph given by
+    `neighbors(state)`, reusing work between queries.
+
+    Keeps the full BFS tree of the `cache_size` most recently repeated
+    sources, so further queries from (or to) those people are lookups, and
+    the BFS distances from a few landmark people, which bound every distance
+    and rule out disconnected pairs without searching.
+    """
+
+    def __init__(self, neighbors, cache_size=0, landmarks=(), size=None):
+        """
+        Create an index over `neighbors`, caching up to `cache_size` BFS trees
+        and precomputing distances from each state in `landmarks`.
+
+        If the states are the integers 0 to `size` - 1, landmark distances
+        are stored as arrays of 16-bit integers rather than dictionaries.
+        """
+        self.neighbors = neighbors
+        self.cache_size = cache_size
+        self.size = size
+        self.trees = OrderedDict()
+
+        # Recent sources without a tree, so a repeated source gets one
+        self.recent = OrderedDict()
+        self.landmarks = [
+            (landmark, self.distances_from(landmark, size))
+            for landmark in landmarks
+        ]
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (action, state) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+        if self.bounds(source, target)[0] == math.inf:
+            return None
+
+        # Follow a cached tree from either end if there is one
+        if source in self.trees:
+            return tree_path(self.tree(source), target)
+        if target in self.trees:
+            return reverse_path(tree_path(self.tree(target), source), target)
+
+        # Only pay for a whole tree once a source comes up again
+        if source in self.recent:
+            del self.recent[source]
+            return tree_path(self.tree(source), target)
+        if self.cache_size > 0:
+            self.recent[source] = True
+            if len(self.recent) > 4 * self.cache_size:
+                self.recent.popitem(last=False)
+        return bidirectional_search(source, target, self.neighbors)
+
+    def distance(self, source, target):
+        """
+        Returns the number of steps between the source and the target,
+        or None if they are not connected.
+        """
+        lower, upper = self.bounds(source, target)
+        if lower == math.inf:
+            return None
+        if lower == upper:
+            return lower
+        path = self.shortest_path(source, target)
+        return None if path is None else len(path)
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between the source and
+        the target from the landmark distances. Both are infinite if the
+        landmarks show that the two are not connected.
+        """
+        lower, upper = 0, math.inf
+        for _, distances in self.landmarks:
+            d1 = landmark_distance(distances, source)
+            d2 = landmark_distance(distances, target)
+            if d1 is None and d2 is None:
+                continue
+            if d1 is None or d2 is None:
+                return math.inf, math.inf
+            lower = max(lower, abs(d1 - d2))
+            upper = min(upper, d1 + d2)
+        return lower, upper
+
+    def update(self, groups, size=None):
+        """
+        Bring the index up to date after edges were added to the graph, where
+        every state in each of `groups` is now a neighbor of every other,
+        e.g. everyone who starred in a movie that gained a star.
+
+        A cached tree or landmark only stays valid if, within every group,
+        it reaches either none of the states or all of them at depths at
+        most one apart. Other trees are dropped and other landmarks are
+        recomputed; `size` is the new number of states, if it has grown.
+        """
+        if size is not None:
+            self.size = size
+        groups = [list(group) for group in groups]
+
+        for source, tree in list(self.trees.items()):
+            if any(stale([tree_depth(tree, state) for state in group])
+                   for group in groups):
+                del self.trees[source]
+
+        for k, (landmark, distances) in enumerate(self.landmarks):
+            if any(stale([landmark_distance(distances, state) for state in group])
+                   for group in groups):
+                self.landmarks[k] = (landmark, self.distances_from(landmark, self.size))
+
+    def tree(self, source):
+        """
+        Returns the BFS tree from `source`, mapping every reachable state to
+        the (action, state) one step closer to the source, and None for the
+        source itself. Builds and caches the tree if needed.
+        """
+        if source in self.trees:
+            self.trees.move_to_end(source)
+            return self.trees[source]
+
+        tree = {source: None}
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                for action, neighbor in self.neighbors(state):
+                    if neighbor not in tree:
+                        tree[neighbor] = (action, state)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        if self.cache_size > 0:
+            self.trees[source] = tree
+            if len(self.trees) > self.cache_size:
+                self.trees.popitem(last=False)
+        return tree
+
+    def distances_from(self, source, size):
+        """
+        Returns the BFS distance from `source` to every reachable state.
+        """
+        if size is None:
+            distances = {source: 0}
+        else:
+            distances = array("h", [-1]) * size
+            distances[source] = 0
+
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for state in frontier:
+                for _, neighbor in self.neighbors(state):
+                    if landmark_distance(distances, neighbor) is None:
+                        distances[neighbor] = depth
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances
+
+
+def landmark_distance(distances, state):
+    """
+    Returns the distance to `state` from a landmark's distances,
+    or None if it cannot be reached.
+    """
+    if isinstance(distances, dict):
+        return distances.get(state)
+    if state >= len(distances) or distances[state] < 0:
+        return None
+    return distances[state]
+
+
+def tree_depth(tree, state):
+    """
+    Returns the depth of `state` in `tree`, or None if it is not in the tree.
+    """
+    if state not in tree:
+        return None
+    depth = 0
+    while tree[state] is not None:
+        state = tree[state][1]
+        depth += 1
+    return depth
+
+
+def stale(depths):
+    """
+    Returns True if linking states at `depths` (None for unreached states)
+    to each other would give some of them a shorter path from the root.
+    """
+    reached = [depth for depth in depths if depth is not None]
+    if not reached:
+        return False
+    return len(reached) < len(depths) or max(reached) - min(reached) > 1
+
+
+def tree_path(tree, target):
+    """
+    Returns the list of (action, state) pairs from the root of `tree`
+    to `target`, or None if `target` is not in the tree.
+    """
+    if target not in tree:
+        return None
+    path = []
+    state = target
+    while tree[state] is not None:
+        action, parent = tree[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+    return path
+
+
+def reverse_path(path, start):
+    """
+    Returns `path`, a list of (action, state) pairs leading away from
+    `start`, as the list of pairs leading back to `start`.
+    """
+    if path is None:
+        return None
+    states = [start] + [state for _, state in path]
+    return [
+        (path[k][0], states[k])
+        for k in range(len(path) - 1, -1, -1)
+    ]
@@ -0,0 +1,219 @@
+import bisect
+import heapq
+from array import array
+from collections import Counter
+
+# Most edits a fuzzy lookup can allow
+MAX_DISTANCE = 2
+
+# Number of segments every name is split into
+SEGMENTS = 4
+
+
+class NameIndex():
+    """
+    Index of names for prefix autocomplete and typo-tolerant lookup.
+
+    Names are kept sorted for prefix search, and every name is split into
+    SEGMENTS segments of nearly equal length, each listed under its text,
+    its number and the length of the name. k edits can only change k of
+    the segments, so a name within k edits of a query has at least
+    SEGMENTS - k segments left intact, each found in the query no more
+    than k letters from where it starts in the name. Looking up those
+    substrings of the query finds every candidate with a few dictionary
+    lookups, names whose letters differ too much from the query's are
+    ruled out by comparing bitmasks, and only the rest are compared with
+    the query letter by letter.
+    """
+
+    def __init__(self, names=()):
+        """
+        Create an index of `names`, matching them case-insensitively
+        but returning them as given.
+        """
+        self.display = {}
+        self.keys = []
+        for name in names:
+            key = name.lower()
+            if key not in self.display:
+                self.display[key] = name
+                self.keys.append(key)
+        self.keys.sort()
+
+        # Map (length, segment number, segment) to the positions of names
+        # with that segment in the list of names in the order they were added
+        self.added = list(self.display)
+        self.segments = {}
+        for k, key in enumerate(self.added):
+            self.index_segments(key, k)
+
+        # Which letters each name has, by position
+        self.letters = array("q", (letter_set(key) for key in self.added))
+
+    def index_segments(self, key, k):
+        """
+        List the name at position `k` under each of its segments.
+        """
+        bounds = segment_bounds(len(key))
+        for number in range(SEGMENTS):
+            segment = key[bounds[number]:bounds[number + 1]]
+            self.segments.setdefault((len(key), number, segment), []).append(k)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, name):
+        """
+        Add `name` to the index, if it is not already there.
+        """
+        key = name.lower()
+        if key in self.display:
+            return
+        self.display[key] = name
+        bisect.insort(self.keys, key)
+        self.index_segments(key, len(self.added))
+        self.letters.append(letter_set(key))
+        self.added.append(key)
+
+    def prefix(self, query, limit=10):
+        """
+        Return up to `limit` names starting with `query`, in alphabetical order.
+        """
+        query = query.lower()
+        start = bisect.bisect_left(self.keys, query)
+        names = []
+        for key in self.keys[start:start + limit]:
+            if not key.startswith(query):
+                break
+            names.append(self.display[key])
+        return names
+
+    def fuzzy(self, query, limit=10, max_distance=None):
+        """
+        Return up to `limit` (name, distance) pairs for the names closest to
+        `query`, where distance is the number of single-letter insertions,
+        deletions and substitutions between them, best matches first.
+
+        Only names within `max_distance` edits are returned, which can be
+        at most MAX_DISTANCE; by default one edit is allowed for queries up
+        to five letters and two for longer ones.
+        """
+        query = query.lower()
+        if max_distance is None:
+            max_distance = 1 if len(query) <= 5 else 2
+        if max_distance > MAX_DISTANCE:
+            raise ValueError(f"at most {MAX_DISTANCE} edits can be allowed")
+
+        # Count the segments of each name of about the right length
+        # that are found near the same place in the query
+        needed = SEGMENTS - max_distance
+        found = Counter()
+        for length in range(
+            max(len(query) - max_distance, 1), len(query) + max_distance + 1
+        ):
+            bounds = segment_bounds(length)
+            for number in range(SEGMENTS):
+                size = bounds[number + 1] - bounds[number]
+                starts = range(
+                    max(bounds[number] - max_distance, 0),
+                    min(bounds[number] + max_distance, len(query) - size) + 1
+                )
+                substrings = {query[start:start + size] for start in starts}
+                for substring in substrings:
+                    found.update(self.segments.get((length, number, substring), ()))
+
+        # Each edit adds at most one letter to either name that the
+        # other does not have
+        letters = letter_set(query)
+        matches = []
+        for k, count in found.most_common():
+            if count < needed:
+                break
+            if (
+                (self.letters[k] & ~letters).bit_count() > max_distance
+                or (letters & ~self.letters[k]).bit_count() > max_distance
+            ):
+                continue
+            key = self.added[k]
+            distance = edit_distance(query, key, max_distance)
+            if distance is not None:
+                matches.append((distance, key))
+
+        return [
+            (self.display[key], distance)
+            for distance, key in heapq.nsmallest(limit, matches)
+        ]
+
+    def lookup(self, query, limit=10):
+        """
+        Return up to `limit` names matching `query`: an exact match first,
+        then names starting with it, then names within a few typos of it.
+        """
+        names = []
+        if query.lower() in self.display:
+            names.append(self.display[query.lower()])
+        for name in self.prefix(query, limit):
+            if name not in names:
+                names.append(name)
+
+        # Only look for typos if there are not enough names already
+        if len(names) < limit:
+            for name, _ in self.fuzzy(query, limit):
+                if name not in names:
+                    names.append(name)
+        return names[:limit]
+
+
+def segment_bounds(length):
+    """
+    Return where each of the SEGMENTS segments of a name of
+    `length` letters starts, followed by `length`.
+    """
+    return [length * number // SEGMENTS for number in range(SEGMENTS + 1)]
+
+
+def letter_set(key):
+    """
+    Return the set of characters in `key` as a 63-bit mask, with all
+    but the most common characters sharing bits.
+    """
+    mask = 0
+    for character in key:
+        mask |= 1 << (ord(character) % 63)
+    return mask
+
+
+def edit_distance(a, b, limit):
+    """
+    Return the Levenshtein distance between `a` and `b`,
+    or None if it is more than `limit`.
+
+    Only letters at most `limit` places apart are compared, since lining
+    up any others already takes more than `limit` edits.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return None
+
+    # Distances of more than `limit` are all stored as limit + 1
+    over = limit + 1
+    previous = [min(j, over) for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        current[0] = min(i, over)
+        best = current[0]
+        for j in range(max(i - limit, 1), min(i + limit, len(b)) + 1):
+            cost = previous[j - 1] + (a[i - 1] != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+
+        # Stop once every way of finishing costs too much
+        if best > limit:
+            return None
+        previous = current
+
+    return previous[-1] if previous[-1] <= limit else None
@@ -0,0 +1,272 @@
+import functools
+import json
+import multiprocessing
+import os
+import signal
+import socketserver
+import stat
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_pool(workers):
+    """
+    Return a process pool of `workers` processes, or None for one worker.
+
+    Workers are forked after the graph is loaded, so they share it with
+    the parent copy-on-write instead of loading their own.
+    """
+    if workers <= 1:
+        return None
+    return multiprocessing.get_context("fork").Pool(
+        workers, initializer=signal.signal,
+        initargs=(signal.SIGINT, signal.SIG_IGN)
+    )
+
+
+def parse_pair(line):
+    """
+    Return the (name1, name2) pair on a line of batch input, given either
+    as a JSON array of two names or as two tab-separated names.
+    """
+    line = line.strip()
+    if line.startswith("["):
+        try:
+            pair = json.loads(line)
+        except json.JSONDecodeError:
+            pair = None
+    else:
+        pair = line.split("\t")
+    if (not isinstance(pair, list) or len(pair) != 2
+            or not all(isinstance(name, str) for name in pair)):
+        raise ValueError(f"expected two names, got {line!r}")
+    return pair
+
+
+def answer_line(answer, line):
+    """
+    Return the result of `answer` for the pair of names on `line`.
+    """
+    try:
+        name1, name2 = parse_pair(line)
+    except ValueError as error:
+        return {"error": str(error)}
+    return answer(name1, name2)
+
+
+def run_batch(lines, output, answer, workers):
+    """
+    Answer every pair of names in `lines` with `answer`, writing one JSON
+    result per line to `output` in the same order as the input.
+
+    Results are written as soon as they are ready, so `lines` can be a
+    stream such as stdin.
+    """
+    lines = (line for line in lines if line.strip())
+    task = functools.partial(answer_line, answer)
+    pool = make_pool(workers)
+    try:
+        if pool is None:
+            results = map(task, lines)
+        else:
+            results = pool.imap(task, lines, chunksize=8)
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+class Workers():
+    """
+    Runs queries in a pool of processes forked from this one, or in the
+    calling thread for one worker, and lets this process change the data
+    the queries read in between.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.pool = make_pool(workers)
+
+    def apply(self, function, *args):
+        return self.call("apply", function, args)
+
+    def map(self, function, items):
+        return self.call("map", function, items, chunksize=8)
+
+    def call(self, method, function, *args, **kwargs):
+        while True:
+            pool = self.pool
+            if pool is None:
+                with self.lock:
+                    if method == "apply":
+                        return function(*args[0])
+                    return list(map(function, *args))
+            try:
+                return getattr(pool, method)(function, *args, **kwargs)
+            except ValueError:
+                # The pool was closed by an update after we picked it up,
+                # so try again with its replacement
+                if pool is self.pool:
+                    raise
+
+    def update(self, function, *args):
+        """
+        Run `function` in this process and fork new workers that see what it
+        changed. Queries already sent to the old workers finish there.
+        """
+        with self.lock:
+            result = function(*args)
+            old, self.pool = self.pool, make_pool(self.workers)
+        if old is not None:
+            old.close()
+            threading.Thread(target=old.join, daemon=True).start()
+        return result
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """
+    Answers `GET /?source=NAME&target=NAME` with a JSON result, and
+    `POST /` with a body of batch input lines with JSON lines of results.
+
+    If the server has a complete function, `GET /complete?prefix=TEXT`
+    answers with a JSON list of names, limited by an optional `limit`.
+
+    If the server has an update function, `POST /update?directory=DIR`
+    applies the data in DIR before answering any further queries.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == "/complete":
+            self.do_complete(query)
+            return
+        if "source" not in query or "target" not in query:
+            self.send_json(400, {"error": "source and target are required"})
+            return
+        result = self.server.workers.apply(
+            self.server.answer, query["source"][0], query["target"][0]
+        )
+        self.send_json(200, result)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path == "/update":
+            self.do_update(parse_qs(url.query))
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        lines = self.rfile.read(length).decode("utf-8").splitlines()
+        lines = [line for line in lines if line.strip()]
+        task = functools.partial(answer_line, self.server.answer)
+        results = self.server.workers.map(task, lines)
+        body = "".join(json.dumps(result) + "\n" for result in results)
+        self.send_body(200, "application/x-ndjson", body)
+
+    def do_complete(self, query):
+        if self.server.complete is None:
+            self.send_json(404, {"error": "completion is not supported"})
+            return
+        if "prefix" not in query:
+            self.send_json(400, {"error": "prefix is required"})
+            return
+        try:
+            limit = int(query.get("limit", ["10"])[0])
+        except ValueError:
+            self.send_json(400, {"error": "limit must be an integer"})
+            return
+        result = self.server.workers.apply(
+            self.server.complete, query["prefix"][0], limit
+        )
+        self.send_json(200, result)
+
+    def do_update(self, query):
+        if self.server.update is None:
+            self.send_json(404, {"error": "updates are not supported"})
+            return
+        if "directory" not in query:
+            self.send_json(400, {"error": "directory is required"})
+            return
+        try:
+            changed = self.server.workers.update(
+                self.server.update, query["directory"][0]
+            )
+        except (OSError, KeyError, ValueError) as error:
+            self.send_json(400, {"error": str(error)})
+            return
+        self.send_json(200, {"changed": changed})
+
+    def send_json(self, status, result):
+        self.send_body(status, "application/json", json.dumps(result) + "\n")
+
+    def send_body(self, status, content_type, body):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_close(self):
+        super().server_close()
+        os.remove(self.server_address)
+
+
+def make_server(address, handler):
+    """
+    Return an HTTP server for `handler` listening on `address`, which is
+    either HOST:PORT or the path of a Unix socket.
+    """
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return ThreadingHTTPServer((host, int(port)), handler)
+    # Replace a socket left behind by a previous server, but nothing else
+    if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+        os.remove(address)
+    return UnixHTTPServer(address, handler)
+
+
+def serve(address, answer, workers, update=None, complete=None):
+    """
+    Answer queries with `answer` over HTTP on `address` until interrupted.
+
+    If `update` is given, `POST /update?directory=DIR` calls `update(DIR)`
+    to change the loaded data without restarting the server. If `complete`
+    is given, `GET /complete?prefix=TEXT&limit=N` calls `complete(TEXT, N)`.
+    """
+    server = make_server(address, QueryHandler)
+    server.answer = answer
+    server.update = update
+    server.complete = complete
+    server.workers = Workers(workers)
+
+    # Shut down cleanly when stopped by a service manager too
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    print(f"Serving on {address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.workers.close()
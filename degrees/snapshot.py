@@ -0,0 +1,163 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph, apply_delta, load_graph, string_table
+
+MAGIC = b"DEGSNAP1"
+
+# Sections of a snapshot, in the order they are written
+SECTIONS = [
+    "person_offsets", "person_movies", "movie_offsets", "movie_stars",
+    "person_id_offsets", "person_id_data",
+    "person_name_offsets", "person_name_data",
+    "person_birth_offsets", "person_birth_data",
+    "movie_id_offsets", "movie_id_data",
+    "movie_title_offsets", "movie_title_data",
+    "movie_year_offsets", "movie_year_data",
+    "people_by_id", "movies_by_id", "people_by_name"
+]
+
+# Header is the magic string followed by (offset, length) of every section
+HEADER = struct.Struct("<8s" + "QQ" * len(SECTIONS))
+
+
+def main():
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python snapshot.py source snapshot [delta ...]")
+    source, filename, deltas = sys.argv[1], sys.argv[2], sys.argv[3:]
+
+    # Start from a directory of CSVs or from an earlier snapshot
+    print("Loading data...")
+    if os.path.isdir(source):
+        graph = load_graph(source)
+    else:
+        graph = SnapshotGraph(source)
+    for delta in deltas:
+        print(f"Applying {delta}...")
+        apply_delta(graph, delta)
+    print("Writing snapshot...")
+    write_snapshot(graph, filename)
+    print(f"Snapshot written to {filename}.")
+
+
+def write_snapshot(graph, filename):
+    """
+    Write `graph`, including anything added to it since it was loaded,
+    to `filename` as a binary snapshot that SnapshotGraph can memory-map.
+
+    All integers are little-endian 64-bit values, every section starts on
+    an 8-byte boundary, and strings are stored as UTF-8 bytes plus an
+    offsets array, so nothing has to be parsed when the snapshot is opened.
+    """
+    people = range(graph.num_people)
+    movies = range(graph.num_movies)
+    person_records = [graph.person_record(i) for i in people]
+    movie_records = [graph.movie_record(j) for j in movies]
+
+    person_offsets, person_movies = flatten(graph.movies_of(i) for i in people)
+    movie_offsets, movie_stars = flatten(graph.stars_of(j) for j in movies)
+
+    sections = {
+        "person_offsets": person_offsets,
+        "person_movies": person_movies,
+        "movie_offsets": movie_offsets,
+        "movie_stars": movie_stars,
+        "people_by_id": int_array(
+            sorted(people, key=lambda i: person_records[i][0])
+        ),
+        "movies_by_id": int_array(
+            sorted(movies, key=lambda j: movie_records[j][0])
+        ),
+        "people_by_name": int_array(
+            sorted(people, key=lambda i: person_records[i][1].lower())
+        )
+    }
+    for field, column in [("id", 0), ("name", 1), ("birth", 2)]:
+        offsets, data = string_table(record[column] for record in person_records)
+        sections[f"person_{field}_offsets"] = int_array(offsets)
+        sections[f"person_{field}_data"] = data
+    for field, column in [("id", 0), ("title", 1), ("year", 2)]:
+        offsets, data = string_table(record[column] for record in movie_records)
+        sections[f"movie_{field}_offsets"] = int_array(offsets)
+        sections[f"movie_{field}_data"] = data
+
+    # Lay out every section after the header on an 8-byte boundary
+    layout = []
+    position = aligned(HEADER.size)
+    for name in SECTIONS:
+        length = len(memoryview(sections[name]).cast("B"))
+        layout.extend([position, length])
+        position = aligned(position + length)
+
+    # Write next to the old snapshot and swap it in, so processes that
+    # have the old one mapped keep a consistent view of it
+    with open(f"{filename}.tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, *layout))
+        for name, position in zip(SECTIONS, layout[::2]):
+            f.write(b"\0" * (position - f.tell()))
+            f.write(sections[name])
+    os.replace(f"{filename}.tmp", filename)
+
+
+def int_array(values):
+    """
+    Return `values` as an array of little-endian 64-bit integers.
+    """
+    values = array("q", values)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+def flatten(lists):
+    """
+    Return (offsets, values) for an iterable of lists of integers, where
+    list i is values[offsets[i]:offsets[i + 1]].
+    """
+    values = array("q")
+    offsets = array("q", [0])
+    for values_list in lists:
+        values.extend(values_list)
+        offsets.append(len(values))
+    return int_array(offsets), int_array(values)
+
+
+def aligned(position):
+    return (position + 7) & ~7
+
+
+class SnapshotGraph(CompactGraph):
+    """
+    CompactGraph backed by a memory-mapped snapshot written by `write_snapshot`.
+
+    Opening a snapshot only reads its header. Adjacency arrays, strings and
+    lookups are read straight from the mapped file as they are used, and
+    processes that open the same snapshot share its pages.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = HEADER.unpack_from(self.buffer)
+        if header[0] != MAGIC:
+            raise ValueError(f"{filename} is not a degrees snapshot")
+        if sys.byteorder != "little":
+            raise ValueError("snapshots can only be mapped on little-endian machines")
+
+        view = memoryview(self.buffer)
+        for k, name in enumerate(SECTIONS):
+            position, length = header[1 + 2 * k], header[2 + 2 * k]
+            section = view[position:position + length]
+            if not name.endswith("_data"):
+                section = section.cast("q")
+            setattr(self, name, section)
+
+        self.clear_overlays()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from collections import Counter, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -36,3 +39,120 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier backed by a deque, with a companion count of the states
+    it holds so that `contains_state` and `remove` take constant time.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = Counter()
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] += 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard(node.state)
+            return node
+
+    def discard(self, state):
+        self.states[state] -= 1
+        if self.states[state] == 0:
+            del self.states[state]
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the list of (action, state) pairs from the source
+    of `forward` to the target of `backward`, passing through `meeting`.
+    """
+    path = []
+
+    # Walk back from the meeting state to the source
+    state = meeting
+    while forward[state] is not None:
+        action, parent = forward[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+
+    # Walk on from the meeting state to the target
+    state = meeting
+    while backward[state] is not None:
+        action, state = backward[state]
+        path.append((action, state))
+
+    return path
+
+
+def bidirectional_search(source, target, neighbors):
+    """
+    Returns the shortest list of (action, state) pairs that connect the
+    source to the target, where `neighbors(state)` yields the (action, state)
+    pairs reachable from a state in one step and every step can be reversed.
+
+    Searches outwards from both ends at once, always expanding the smaller
+    frontier by one whole level. If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # For each side, map every reached state to (action, state)
+    # of the neighbor one step closer to that side's starting state
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    # Keep looking while both sides still have states to expand
+    while forward_frontier and backward_frontier:
+
+        # Expand the smaller frontier by one whole level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        next_frontier = []
+        for state in frontier:
+            for action, neighbor in neighbors(state):
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (action, state)
+                next_frontier.append(neighbor)
+
+                # Both searches have reached this state, so they meet here
+                if neighbor in others:
+                    return join_paths(forward, backward, neighbor)
+
+        if parents is forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
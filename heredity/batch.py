@@ -0,0 +1,131 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+
+from heredity import METHODS, SAMPLES, compute, load_data
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for many families."
+    )
+    parser.add_argument(
+        "families",
+        help="directory of family CSVs, or a manifest listing one CSV per "
+             "line ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="write results to FILE as JSON lines instead of stdout"
+    )
+    parser.add_argument(
+        "--method", choices=METHODS, default="elimination",
+        help="inference method (default: elimination)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of processes computing families"
+    )
+    parser.add_argument(
+        "--samples", type=int, default=SAMPLES, metavar="N",
+        help=f"number of samples to draw when sampling (default: {SAMPLES})"
+    )
+    parser.add_argument(
+        "--seed", type=int, help="random seed for sampling each family"
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95,
+        help="confidence level of the intervals when sampling"
+    )
+    args = parser.parse_args()
+
+    options = {
+        "method": args.method, "samples": args.samples,
+        "seed": args.seed, "confidence": args.confidence
+    }
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        failed = run_batch(find_families(args.families), output, options, args.workers)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if failed:
+        sys.exit(f"{failed} families could not be computed")
+
+
+def find_families(source):
+    """
+    Return the paths of the family CSVs in `source`: every CSV in a
+    directory and its subdirectories, in sorted order, or the paths listed
+    one per line in a manifest file, relative to the manifest's directory.
+    """
+    if os.path.isdir(source):
+        families = []
+        for root, directories, files in os.walk(source):
+            directories.sort()
+            for filename in sorted(files):
+                if filename.endswith(".csv"):
+                    families.append(os.path.join(root, filename))
+        return families
+
+    if source == "-":
+        lines, folder = sys.stdin.read().splitlines(), ""
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines, folder = f.read().splitlines(), os.path.dirname(source)
+    return [os.path.join(folder, line.strip()) for line in lines if line.strip()]
+
+
+def run_batch(families, output, options, workers):
+    """
+    Compute every family in `families` with `options` for `compute`, writing
+    one JSON result per line to `output` in the same order, and return the
+    number of families that could not be read.
+
+    Workers are started once for the whole batch, so each family only costs
+    its own inference rather than a new process and its imports.
+    """
+    tasks = [(path, options) for path in families]
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.imap(compute_family, tasks, chunksize=4)
+            return write_results(results, output)
+    return write_results(map(compute_family, tasks), output)
+
+
+def write_results(results, output):
+    """
+    Write each of `results` to `output` as a line of JSON as soon as it is
+    ready, and return how many of them are errors.
+    """
+    failed = 0
+    for result in results:
+        failed += "error" in result
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+    return failed
+
+
+def compute_family(task):
+    """
+    Return the result for one family: its path and either its probabilities
+    (and intervals, if sampled) or the error that stopped it being read.
+    """
+    path, options = task
+    try:
+        people = load_data(path)
+    except (OSError, KeyError, UnicodeDecodeError) as e:
+        return {"family": path, "error": f"{type(e).__name__}: {e}"}
+
+    # Workers cannot start processes of their own, so shards run in turn
+    probabilities, intervals = compute(people, workers=1, **options)
+    result = {"family": path, "probabilities": probabilities}
+    if intervals is not None:
+        result["intervals"] = intervals
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import heapq
+import itertools
+
+from tables import GENES, person_tables
+
+
+def infer(people, probs):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    given the known traits and the model in `probs`, in the same format as
+    the `probabilities` dictionary computed by enumeration in heredity.main.
+
+    Rather than enumerating every assignment of genes and traits, builds a
+    junction tree for the family by variable elimination and passes
+    messages up and down it once. Each step only involves a person and
+    the relatives they are still connected to, so for families shaped like
+    trees the work grows linearly with the number of people.
+    """
+    factors = [person_factor(people, person, probs) for person in people]
+    cliques, parents, assigned = junction_tree(list(people), factors)
+
+    # Each clique's own potential is the product of the factors given to it
+    potentials = [
+        multiply([factors[k] for k in assigned[c]], cliques[c])
+        for c in range(len(cliques))
+    ]
+    children = [[] for _ in cliques]
+    for c, parent in enumerate(parents):
+        if parent is not None:
+            children[parent].append(c)
+
+    # Cliques are created before their parents, so this order passes
+    # messages up the tree, and the reverse order passes them back down
+    up = [None] * len(cliques)
+    for c in range(len(cliques)):
+        incoming = [potentials[c]] + [up[child] for child in children[c]]
+        up[c] = normalize(
+            marginalize(multiply(incoming, cliques[c]), separator(cliques, c))
+        )
+    down = [None] * len(cliques)
+    beliefs = [None] * len(cliques)
+    for c in reversed(range(len(cliques))):
+        incoming = [potentials[c]] + [up[child] for child in children[c]]
+        if down[c] is not None:
+            incoming.append(down[c])
+        beliefs[c] = multiply(incoming, cliques[c])
+        for child in children[c]:
+            others = [factor for factor in incoming if factor is not up[child]]
+            down[child] = normalize(marginalize(
+                multiply(others, cliques[c]), separator(cliques, child)
+            ))
+
+    probabilities = {}
+    for c, clique in enumerate(cliques):
+        person = clique[0]
+        variables, table = marginalize(beliefs[c], (person,))
+        total = sum(table.values())
+        gene = {g: table[(g,)] / total for g in (2, 1, 0)}
+
+        # Traits only depend on genes, so an unknown trait follows from them
+        _, _, trait = person_tables(people, person, probs)
+        if people[person]["trait"] is None:
+            has_trait = sum(gene[g] * trait[g] for g in GENES)
+        else:
+            has_trait = trait[0]
+        probabilities[person] = {
+            "gene": gene,
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return {person: probabilities[person] for person in people}
+
+
+def person_factor(people, person, probs):
+    """
+    Return the factor for how many copies of the gene `person` has, given
+    how many their parents have, times the probability of their trait if
+    it is known.
+    """
+    mother = people[person]["mother"]
+    father = people[person]["father"]
+    variables = (person,) + tuple(
+        parent for parent in (mother, father) if parent in people
+    )
+    cpt, likelihood, _ = person_tables(people, person, probs)
+
+    table = {}
+    for assignment in itertools.product(GENES, repeat=len(variables)):
+        genes = dict(zip(variables, assignment))
+        gene = assignment[0]
+        table[assignment] = (
+            cpt[genes.get(mother, 0)][genes.get(father, 0)][gene]
+            * likelihood[gene]
+        )
+    return variables, table
+
+
+def junction_tree(variables, factors):
+    """
+    Return (cliques, parents, assigned) for a junction tree of `factors`
+    found by simulating variable elimination.
+
+    Variables are eliminated one at a time, each time choosing one with the
+    fewest neighbors still to eliminate. Eliminating a variable creates a
+    clique of it and its neighbors, listed with the eliminated variable
+    first; `parents[c]` is the clique that later uses the message from
+    clique c, or None, and `assigned[c]` lists the factors multiplied into
+    clique c.
+    """
+    neighbors = {variable: set() for variable in variables}
+    for scope, _ in factors:
+        for variable in scope:
+            neighbors[variable].update(scope)
+            neighbors[variable].discard(variable)
+
+    # Scopes of the factors and messages not yet used,
+    # and which of them each variable is in
+    scopes = {}
+    using = {variable: set() for variable in variables}
+    for k, (scope, _) in enumerate(factors):
+        scopes[("factor", k)] = set(scope)
+        for variable in scope:
+            using[variable].add(("factor", k))
+
+    # Queue of variables by their number of neighbors, which goes stale
+    # as neighbors are connected and is checked when a variable comes out
+    position = {variable: k for k, variable in enumerate(variables)}
+    queue = [(len(neighbors[v]), position[v], v) for v in variables]
+    heapq.heapify(queue)
+
+    cliques = []
+    parents = []
+    assigned = []
+    eliminated = set()
+    while queue:
+        degree, _, variable = heapq.heappop(queue)
+        if variable in eliminated or degree != len(neighbors[variable]):
+            continue
+        eliminated.add(variable)
+
+        c = len(cliques)
+        used = using.pop(variable)
+        scope = set().union(*(scopes[item] for item in used)) - {variable}
+        cliques.append((variable,) + tuple(sorted(scope, key=position.get)))
+        parents.append(None)
+        assigned.append([])
+        for item in sorted(used):
+            for other in scopes.pop(item) - {variable}:
+                using[other].discard(item)
+            kind, k = item
+            if kind == "factor":
+                assigned[c].append(k)
+            else:
+                parents[k] = c
+        scopes[("message", c)] = scope
+        for other in scope:
+            using[other].add(("message", c))
+
+        # Eliminating a variable connects all of its neighbors
+        for neighbor in neighbors[variable]:
+            neighbors[neighbor].update(neighbors[variable])
+            neighbors[neighbor] -= {neighbor, variable}
+            heapq.heappush(
+                queue, (len(neighbors[neighbor]), position[neighbor], neighbor)
+            )
+    return cliques, parents, assigned
+
+
+def separator(cliques, c):
+    """
+    Return the variables clique c shares with its parent.
+    """
+    return cliques[c][1:]
+
+
+def multiply(factors, variables):
+    """
+    Return the product of `factors` as a factor over `variables`,
+    which must include every variable of every factor.
+    """
+    positions = [
+        [variables.index(variable) for variable in scope]
+        for scope, _ in factors
+    ]
+    table = {}
+    for assignment in itertools.product(GENES, repeat=len(variables)):
+        p = 1
+        for (_, factor_table), indices in zip(factors, positions):
+            p *= factor_table[tuple(assignment[i] for i in indices)]
+        table[assignment] = p
+    return tuple(variables), table
+
+
+def normalize(factor):
+    """
+    Return `factor` scaled to sum to 1, so that products of many small
+    probabilities in large families do not underflow.
+    """
+    scope, table = factor
+    total = sum(table.values())
+    return scope, {assignment: p / total for assignment, p in table.items()}
+
+
+def marginalize(factor, variables):
+    """
+    Return `factor` with every variable other than `variables` summed out.
+    """
+    scope, table = factor
+    indices = [scope.index(variable) for variable in variables]
+    result = {}
+    for assignment, p in table.items():
+        key = tuple(assignment[i] for i in indices)
+        result[key] = result.get(key, 0) + p
+    return tuple(variables), result
@@ -1,7 +1,14 @@
+import argparse
 import csv
 import itertools
+import os
 import sys
 
+from elimination import infer
+from sampling import estimate, gibbs_sampling, likelihood_weighting
+from sharded import enumerate_probabilities as enumerate_shards
+from tables import tables
+
 PROBS = {
 
     # Unconditional probabilities for having gene
@@ -36,15 +43,112 @@ PROBS = {
     "mutation": 0.01
 }
 
+# Ways to compute the probabilities, the first exact but exponential,
+# and the last two approximate by sampling
+METHODS = [
+    "enumeration", "vectorized", "sharded", "elimination", "likelihood", "gibbs"
+]
+SAMPLERS = {"likelihood": likelihood_weighting, "gibbs": gibbs_sampling}
+SAMPLES = 100000
 
-def main():
 
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compute gene and trait probabilities for a family."
+    )
+    parser.add_argument("data", help="CSV file of the family")
+    parser.add_argument(
+        "--method", choices=METHODS, default="elimination",
+        help="inference method (default: elimination)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of processes for sharded enumeration"
+    )
+    parser.add_argument(
+        "--samples", type=int, default=SAMPLES, metavar="N",
+        help=f"number of samples to draw when sampling (default: {SAMPLES})"
+    )
+    parser.add_argument(
+        "--seed", type=int, help="random seed for sampling"
+    )
+    parser.add_argument(
+        "--confidence", type=float, default=0.95,
+        help="confidence level of the intervals printed when sampling"
+    )
+    parser.add_argument(
+        "--progress", action="store_true",
+        help="print the largest interval to stderr as samples are drawn"
+    )
+    args = parser.parse_args()
+    people = load_data(args.data)
 
     # Keep track of gene and trait probabilities for each person
+    probabilities, intervals = compute(
+        people, args.method, workers=args.workers, samples=args.samples,
+        seed=args.seed, confidence=args.confidence, progress=args.progress
+    )
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                if intervals is None:
+                    print(f"    {value}: {p:.4f}")
+                else:
+                    error = intervals[person][field][value]
+                    print(f"    {value}: {p:.4f} ± {error:.4f}")
+
+
+def compute(people, method, workers=None, samples=SAMPLES, seed=None,
+            confidence=0.95, progress=False):
+    """
+    Return (probabilities, intervals) for `people` computed by `method`,
+    one of METHODS, where `intervals` holds the half-width of a
+    `confidence` interval around each probability when sampling, and is
+    None otherwise.
+    """
+    if method in SAMPLERS:
+        estimates = SAMPLERS[method](
+            people, PROBS, seed=seed, confidence=confidence
+        )
+        if progress:
+            estimates = report(estimates)
+        probabilities, intervals, _ = estimate(estimates, samples)
+        return probabilities, intervals
+    if method == "enumeration":
+        return enumerate_probabilities(people), None
+    if method == "vectorized":
+        from vectorized import enumerate_probabilities as enumerate_arrays
+        return enumerate_arrays(people, PROBS), None
+    if method == "sharded":
+        return enumerate_shards(people, PROBS, workers), None
+    return infer(people, PROBS), None
+
+
+def report(estimates):
+    """
+    Pass on each of `estimates` from a sampler, printing how many samples
+    have been drawn and the widest interval so far to stderr.
+    """
+    for probabilities, intervals, samples in estimates:
+        widest = max(
+            error for person in intervals.values()
+            for field in person.values() for error in field.values()
+        )
+        print(f"{samples} samples: ± {widest:.4f}", file=sys.stderr)
+        yield probabilities, intervals, samples
+
+
+def enumerate_probabilities(people):
+    """
+    Return gene and trait probabilities for each person in `people` by
+    summing the joint probability of every assignment of genes and traits
+    that agrees with the known traits.
+    """
     probabilities = {
         person: {
             "gene": {
@@ -61,6 +165,7 @@ def main():
     }
 
     # Loop over all sets of people who might have the trait
+    model = tables(PROBS)
     names = set(people)
     for have_trait in powerset(names):
 
@@ -78,20 +183,12 @@ def main():
             for two_genes in powerset(names - one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
+                p = joint_probability(people, one_gene, two_genes, have_trait, model)
                 update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
-
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+    return probabilities
 
 
 def load_data(filename):
@@ -128,7 +225,7 @@ def powerset(s):
     ]
 
 
-def joint_probability(people, one_gene, two_genes, have_trait):
+def joint_probability(people, one_gene, two_genes, have_trait, model=None):
     """
     Compute and return a joint probability.
 
@@ -138,39 +235,35 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    `model` is tables.tables(PROBS), looked up if not given.
     """
+    gene_table, inherit, trait_table = model or tables(PROBS)
+    genes = {
+        person: 1 if person in one_gene else 2 if person in two_genes else 0
+        for person in people
+    }
+
     probability = 1
     # Iterate over all people
     for person in people:
         # Record gene # and trait to compute probability for
-        gene = 1 if person in one_gene else 2 if person in two_genes else 0
+        gene = genes[person]
         trait = True if person in have_trait else False
 
         # Record mother and father
         mother = people[person]["mother"]
         father = people[person]["father"]
 
-        # If no mother or father listed, use PROBS to determine gene probabilities
+        # If no mother or father listed, use the unconditional probabilities,
+        # otherwise look up the probability given the parents' genes
         if not mother and not father:
-            probability *= PROBS["gene"][gene]
-        
-        # If mother and father listed
+            probability *= gene_table[gene]
         else:
-            parent_prob = {}
-            for parent in [mother, father]:
-                parent_prob[parent] = (0.5 if parent in one_gene else (1-PROBS["mutation"]) if parent in two_genes else PROBS["mutation"])
-            mother_prob, father_prob = parent_prob[mother], parent_prob[father]
-            
-            # Calculate probabilities for person having "gene" copies of gene
-            if gene == 2:
-                probability *= (mother_prob * father_prob)
-            elif gene == 1:
-                probability *= ((1-mother_prob)*father_prob + (1-father_prob)*mother_prob)
-            else:
-                probability *= ((1-mother_prob)*(1-father_prob))
-        
+            probability *= inherit[gene][genes.get(mother, 0)][genes.get(father, 0)]
+
         # Multiply probability for having gene copies of gene by the probability of having/not having trait
-        probability *= PROBS["trait"][gene][trait]
+        probability *= trait_table[gene][trait]
 
     return probability
 
@@ -0,0 +1,288 @@
+import math
+import random
+import statistics
+
+from tables import person_tables
+
+# Number of samples between updates of the estimates
+BATCH_SIZE = 1000
+
+
+class Family():
+    """
+    A family in the form the samplers use: people by position, with the
+    positions of their parents and children, their tables from
+    tables.person_tables, and an order in which everyone comes after
+    their parents.
+
+    A parent who is not known is at position len(names), which holds no
+    copies of the gene in every list of genes the samplers use.
+    """
+
+    def __init__(self, people, probs):
+        self.names = list(people)
+        n = len(self.names)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.mothers = [index.get(people[name]["mother"], n) for name in self.names]
+        self.fathers = [index.get(people[name]["father"], n) for name in self.names]
+        person = [person_tables(people, name, probs) for name in self.names]
+        self.cpts = [cpt for cpt, _, _ in person]
+        self.likelihoods = [likelihood for _, likelihood, _ in person]
+        self.traits = [trait for _, _, trait in person]
+
+        self.children = [[] for _ in self.names]
+        for i in range(n):
+            for parent in {self.mothers[i], self.fathers[i]} - {n}:
+                self.children[parent].append(i)
+
+        # Order people so that parents come before their children
+        self.order = []
+        placed = {n}
+        for i in range(n):
+            stack = [i]
+            while stack:
+                person = stack[-1]
+                waiting = [
+                    parent for parent in (self.mothers[person], self.fathers[person])
+                    if parent not in placed
+                ]
+                if person in placed:
+                    stack.pop()
+                elif waiting:
+                    stack.extend(waiting)
+                else:
+                    placed.add(person)
+                    self.order.append(person)
+                    stack.pop()
+
+    def genes(self):
+        """
+        Return a list of genes for the family, with no one having the gene.
+        """
+        return [0] * (len(self.names) + 1)
+
+    def gene_probability(self, i, genes):
+        """
+        Return the probability of person i having genes[i] copies of the
+        gene, given how many copies their parents have in `genes`.
+        """
+        return self.given_parents(i, genes)[genes[i]]
+
+    def given_parents(self, i, genes):
+        """
+        Return the probabilities of person i having 0, 1 and 2 copies of
+        the gene given how many copies their parents have in `genes`.
+        """
+        return self.cpts[i][genes[self.mothers[i]]][genes[self.fathers[i]]]
+
+    def evidence(self, i, g):
+        """
+        Return the probability of person i's known trait given g copies
+        of the gene, or 1 if their trait is unknown.
+        """
+        return self.likelihoods[i][g]
+
+    def has_trait(self, i, g):
+        """
+        Return the probability of person i having the trait
+        given g copies of the gene.
+        """
+        return self.traits[i][g]
+
+
+def likelihood_weighting(people, probs, seed=None, confidence=0.95,
+                         batch_size=BATCH_SIZE):
+    """
+    Yield (probabilities, intervals, samples) after every `batch_size`
+    samples for as long as the caller keeps asking, where `probabilities`
+    are the estimates so far in the same format as heredity.main, and
+    `intervals` the half-width of a `confidence` interval around each.
+
+    Each sample draws everyone's genes given their parents' and is weighted
+    by the probability of the known traits. Estimates of unknown traits
+    use the probability of the trait given the genes drawn rather than
+    drawing a trait too, which gives the same answer with less noise.
+    """
+    family = Family(people, probs)
+    rng = random.Random(seed)
+    n = len(family.names)
+    genes = family.genes()
+
+    # Weighted sums for the estimates and their variances, scaled by
+    # the largest weight so far to keep small weights from underflowing
+    largest = -math.inf
+    weights = squared = 0
+    sums = [[0] * 4 for _ in range(n)]
+    squared_sums = [[0] * 4 for _ in range(n)]
+    trait_squares = [0] * n
+    samples = 0
+
+    while True:
+        for _ in range(batch_size):
+            log_weight = 0
+            for i in family.order:
+                genes[i] = draw(rng, family.given_parents(i, genes))
+                log_weight += math.log(family.evidence(i, genes[i]))
+
+            if log_weight > largest:
+                scale = math.exp(largest - log_weight)
+                weights *= scale
+                squared *= scale * scale
+                for i in range(n):
+                    sums[i] = [total * scale for total in sums[i]]
+                    squared_sums[i] = [
+                        total * scale * scale for total in squared_sums[i]
+                    ]
+                    trait_squares[i] *= scale * scale
+                largest = log_weight
+            weight = math.exp(log_weight - largest)
+            weights += weight
+            squared += weight * weight
+
+            # Columns 0 to 2 count genes, and column 3 adds up the trait
+            for i in range(n):
+                trait = family.has_trait(i, genes[i])
+                sums[i][genes[i]] += weight
+                sums[i][3] += weight * trait
+                squared_sums[i][genes[i]] += weight * weight
+                squared_sums[i][3] += weight * weight * trait
+                trait_squares[i] += weight * weight * trait * trait
+            samples += 1
+
+        # Variance of a weighted mean m of values x with weights w is about
+        # sum(w^2 (x - m)^2) / sum(w)^2
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        means = [[total / weights for total in sums[i]] for i in range(n)]
+        errors = []
+        for i in range(n):
+            errors.append([])
+            for column in range(4):
+                mean = means[i][column]
+                square = trait_squares[i] if column == 3 else squared_sums[i][column]
+                variance = (
+                    square - 2 * mean * squared_sums[i][column]
+                    + mean * mean * squared
+                ) / (weights * weights)
+                errors[i].append(z * math.sqrt(max(variance, 0)))
+        yield (
+            distributions(family, means),
+            distributions(family, errors, widths=True),
+            samples
+        )
+
+
+def gibbs_sampling(people, probs, seed=None, confidence=0.95, burn_in=BATCH_SIZE,
+                   batch_size=BATCH_SIZE):
+    """
+    Yield (probabilities, intervals, samples) after every `batch_size`
+    samples, as for `likelihood_weighting`, by Gibbs sampling.
+
+    Starting from genes drawn without regard to the known traits, every
+    sample redraws each person's genes in turn given everyone else's,
+    after `burn_in` samples have been discarded. Estimates average the
+    distributions the genes were drawn from, and intervals come from how
+    much the averages of separate batches vary.
+    """
+    family = Family(people, probs)
+    rng = random.Random(seed)
+    n = len(family.names)
+    genes = family.genes()
+    for i in family.order:
+        genes[i] = draw(rng, family.given_parents(i, genes))
+
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    batch_means = []
+    samples = 0
+    for _ in range(burn_in):
+        sweep(family, genes, rng)
+    while True:
+        sums = [[0] * 4 for _ in range(n)]
+        for _ in range(batch_size):
+            for i, distribution in enumerate(sweep(family, genes, rng)):
+                for g in range(3):
+                    sums[i][g] += distribution[g]
+                    sums[i][3] += distribution[g] * family.has_trait(i, g)
+            samples += 1
+        batch_means.append([
+            [total / batch_size for total in sums[i]] for i in range(n)
+        ])
+
+        means = [
+            [statistics.fmean(batch[i][column] for batch in batch_means)
+             for column in range(4)]
+            for i in range(n)
+        ]
+        if len(batch_means) < 2:
+            errors = [[math.inf] * 4 for _ in range(n)]
+        else:
+            errors = [
+                [z * statistics.stdev(batch[i][column] for batch in batch_means)
+                 / math.sqrt(len(batch_means)) for column in range(4)]
+                for i in range(n)
+            ]
+        yield (
+            distributions(family, means),
+            distributions(family, errors, widths=True),
+            samples
+        )
+
+
+def sweep(family, genes, rng):
+    """
+    Redraw each person's genes in turn given everyone else's, and return
+    the distribution each person's genes were drawn from, by position.
+    """
+    drawn = [None] * len(family.names)
+    for i in family.order:
+        weights = []
+        for g in range(3):
+            genes[i] = g
+            weight = family.gene_probability(i, genes) * family.evidence(i, g)
+            for child in family.children[i]:
+                weight *= family.gene_probability(child, genes)
+            weights.append(weight)
+        total = sum(weights)
+        drawn[i] = [weight / total for weight in weights]
+        genes[i] = draw(rng, drawn[i])
+    return drawn
+
+
+def draw(rng, weights):
+    """
+    Return 0, 1 or 2 with probability proportional to `weights`.
+    """
+    x = rng.random() * sum(weights)
+    if x < weights[0]:
+        return 0
+    if x < weights[0] + weights[1]:
+        return 1
+    return 2
+
+
+def distributions(family, values, widths=False):
+    """
+    Return per-person values, listed by position as those of 0, 1 and 2
+    copies of the gene and of having the trait, in the format of
+    heredity.main. The value for not having the trait is the complement
+    of having it, or the same for interval `widths`.
+    """
+    return {
+        name: {
+            "gene": {g: values[i][g] for g in (2, 1, 0)},
+            "trait": {
+                True: values[i][3],
+                False: values[i][3] if widths else max(1 - values[i][3], 0)
+            }
+        }
+        for i, name in enumerate(family.names)
+    }
+
+
+def estimate(estimates, samples):
+    """
+    Return the last (probabilities, intervals, samples) from `estimates`
+    once at least `samples` samples have been drawn.
+    """
+    for result in estimates:
+        if result[2] >= samples:
+            return result
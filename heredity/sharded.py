@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+
+from tables import person_tables
+
+
+def enumerate_probabilities(people, probs, workers=None, shards=None):
+    """
+    Return the same gene and trait probabilities as enumeration in
+    heredity.main, splitting the assignments of genes into `shards` that
+    are enumerated by a pool of `workers` processes (by default one per
+    CPU, with four shards per worker).
+
+    Assignments are enumerated lazily as pairs of bitmasks of the people
+    with one and two copies of the gene, shard k taking every assignment
+    whose one-copy mask is k modulo the number of shards. Each shard adds
+    up its own probability tables, and the tables are summed at the end.
+    Unknown traits are summed over rather than enumerated.
+    """
+    workers = workers or os.cpu_count()
+    shards = shards or 4 * workers
+    family = encode(people, probs)
+    tasks = [(family, shard, shards) for shard in range(shards)]
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(enumerate_shard, tasks)
+    else:
+        results = [enumerate_shard(task) for task in tasks]
+
+    names = list(people)
+    gene_totals = [[0, 0, 0] for _ in names]
+    trait_totals = [0] * len(names)
+    for shard_genes, shard_traits in results:
+        for i in range(len(names)):
+            for g in range(3):
+                gene_totals[i][g] += shard_genes[i][g]
+            trait_totals[i] += shard_traits[i]
+
+    total = sum(gene_totals[0]) if names else 1
+    probabilities = {}
+    for i, name in enumerate(names):
+        trait = people[name]["trait"]
+        has_trait = trait_totals[i] / total if trait is None else int(trait)
+        probabilities[name] = {
+            "gene": {g: gene_totals[i][g] / total for g in (2, 1, 0)},
+            "trait": {True: has_trait, False: 1 - has_trait}
+        }
+    return probabilities
+
+
+def encode(people, probs):
+    """
+    Return, for each person in `people`, the positions of their mother and
+    father (len(people) if unknown) and their tables from
+    tables.person_tables, and whether their trait is known.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    members = []
+    for name in names:
+        cpt, likelihood, has_trait = person_tables(people, name, probs)
+        members.append((
+            index.get(people[name]["mother"], len(names)),
+            index.get(people[name]["father"], len(names)),
+            cpt, likelihood, has_trait,
+            people[name]["trait"] is not None
+        ))
+    return members
+
+
+def enumerate_shard(task):
+    """
+    Return (gene_totals, trait_totals) for one shard of the assignments:
+    the total probability of each number of copies of the gene for each
+    person, and of having the trait for each person whose trait is unknown.
+    """
+    members, shard, shards = task
+    n = len(members)
+    everyone = (1 << n) - 1
+    gene_totals = [[0, 0, 0] for _ in range(n)]
+    trait_totals = [0] * n
+
+    # A parent who is not known is at position n, without the gene
+    genes = [0] * (n + 1)
+
+    for one in range(shard, 1 << n, shards):
+        # Visit every subset of the people without one copy,
+        # from all of them down to the empty set
+        rest = everyone & ~one
+        two = rest
+        while True:
+            for i in range(n):
+                genes[i] = (one >> i & 1) + 2 * (two >> i & 1)
+
+            p = 1
+            for i, (mother, father, cpt, likelihood, _, _) in enumerate(members):
+                g = genes[i]
+                p *= cpt[genes[mother]][genes[father]][g] * likelihood[g]
+
+            for i, (_, _, _, _, has_trait, known) in enumerate(members):
+                gene_totals[i][genes[i]] += p
+                if not known:
+                    trait_totals[i] += p * has_trait[genes[i]]
+
+            if two == 0:
+                break
+            two = (two - 1) & rest
+    return gene_totals, trait_totals
@@ -0,0 +1,79 @@
+GENES = (0, 1, 2)
+
+# Tables already built, by the model they were built from
+MODEL_CACHE = {}
+PERSON_CACHE = {}
+
+
+def model_key(probs):
+    """
+    Return the numbers of the model in `probs` as a tuple,
+    so that tables built from the same numbers can be reused.
+    """
+    return (
+        tuple(probs["gene"][g] for g in GENES),
+        tuple((probs["trait"][g][True], probs["trait"][g][False]) for g in GENES),
+        probs["mutation"]
+    )
+
+
+def tables(probs):
+    """
+    Return (gene, inherit, trait) for the model in `probs`: the probability
+    of g copies of the gene with no known parents as gene[g], given a
+    mother with m and a father with f copies as inherit[g][m][f], and of
+    trait t given g copies as trait[g][t].
+
+    The tables are built once for each model and shared by every caller,
+    so they must not be changed.
+    """
+    key = model_key(probs)
+    if key not in MODEL_CACHE:
+        mutation = probs["mutation"]
+        passes = [mutation, 0.5, 1 - mutation]
+        inherit = [
+            [[(1 - passes[m]) * (1 - passes[f]) for f in GENES] for m in GENES],
+            [[passes[m] * (1 - passes[f]) + (1 - passes[m]) * passes[f]
+              for f in GENES] for m in GENES],
+            [[passes[m] * passes[f] for f in GENES] for m in GENES]
+        ]
+        gene = [probs["gene"][g] for g in GENES]
+        trait = [dict(probs["trait"][g]) for g in GENES]
+        MODEL_CACHE[key] = gene, inherit, trait
+    return MODEL_CACHE[key]
+
+
+def person_tables(people, person, probs):
+    """
+    Return (cpt, likelihood, has_trait) for `person` in `people`:
+    cpt[m][f][g] is the probability of g copies of the gene given a mother
+    with m and a father with f copies, likelihood[g] the probability of
+    their known trait given g copies (1 if it is unknown), and has_trait[g]
+    the probability of them having the trait given g copies.
+
+    A parent who is not known counts as one without the gene, so only
+    their row of `cpt` is ever used, and for someone with no known parents
+    every row is the unconditional distribution. People whose parents are
+    known or not in the same way and who have the same trait share tables.
+    """
+    mother = people[person]["mother"] is not None
+    father = people[person]["father"] is not None
+    trait = people[person]["trait"]
+    key = (model_key(probs), mother, father, trait)
+    if key not in PERSON_CACHE:
+        gene, inherit, trait_table = tables(probs)
+        if mother or father:
+            cpt = [
+                [tuple(inherit[g][m][f] for g in GENES) for f in GENES]
+                for m in GENES
+            ]
+        else:
+            cpt = [[tuple(gene) for f in GENES] for m in GENES]
+        if trait is None:
+            likelihood = (1, 1, 1)
+            has_trait = tuple(trait_table[g][True] for g in GENES)
+        else:
+            likelihood = tuple(trait_table[g][trait] for g in GENES)
+            has_trait = (int(trait),) * 3
+        PERSON_CACHE[key] = cpt, likelihood, has_trait
+    return PERSON_CACHE[key]
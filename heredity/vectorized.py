@@ -0,0 +1,127 @@
+import numpy as np
+
+from tables import tables
+
+# Number of assignments to evaluate at once
+BLOCK_SIZE = 1 << 16
+
+
+def encode(people):
+    """
+    Return (names, mothers, fathers, traits) for `people` as arrays:
+    the position of each person's mother and father in `names`, len(names)
+    if none is listed or len(names) + 1 if the one listed is not in
+    `people`, and each person's trait as 1, 0 or -1 if unknown.
+    """
+    names = list(people)
+    index = {name: i for i, name in enumerate(names)}
+    index[None] = len(names)
+    mothers = np.array(
+        [index.get(people[name]["mother"], len(names) + 1) for name in names],
+        dtype=np.int64
+    )
+    fathers = np.array(
+        [index.get(people[name]["father"], len(names) + 1) for name in names],
+        dtype=np.int64
+    )
+    traits = np.array(
+        [-1 if people[name]["trait"] is None else int(people[name]["trait"])
+         for name in names],
+        dtype=np.int64
+    )
+    return names, mothers, fathers, traits
+
+
+def model_tables(probs):
+    """
+    Return (gene, inherit, trait) arrays of tables.tables for the model in
+    `probs`, where gene[g] is the unconditional probability of g copies of
+    the gene, inherit[g, m, f] the probability of g copies given a mother
+    with m and a father with f, and trait[g, t] the probability of trait t
+    given g.
+    """
+    gene, inherit, trait = tables(probs)
+    return (
+        np.array(gene),
+        np.array(inherit),
+        np.array([[trait[g][False], trait[g][True]] for g in range(3)])
+    )
+
+
+def joint_probabilities(people, genes, traits, probs):
+    """
+    Return the joint probability of each of a block of assignments, where
+    row k of the integer arrays `genes` and `traits` gives the number of
+    copies of the gene and the trait (0 or 1) of every person in `people`,
+    in order. Row k of the result equals `joint_probability` for the sets
+    of people with one gene, two genes and the trait in assignment k.
+    """
+    _, mothers, fathers, _ = encode(people)
+    gene_table, inherit_table, trait_table = model_tables(probs)
+    genes = np.asarray(genes, dtype=np.int64)
+    factors = gene_factors(genes, mothers, fathers, gene_table, inherit_table)
+    factors *= trait_table[genes, np.asarray(traits, dtype=np.int64)]
+    return factors.prod(axis=1)
+
+
+def gene_factors(genes, mothers, fathers, gene_table, inherit_table):
+    """
+    Return the probability of each person's number of copies of the gene
+    in each assignment in `genes`, given their parents' in the same one.
+    """
+    # A parent who is not known counts as one without the gene, but only
+    # someone with no parents listed has the unconditional probabilities
+    padded = np.concatenate(
+        [genes, np.zeros((len(genes), 2), dtype=np.int64)], axis=1
+    )
+    factors = inherit_table[genes, padded[:, mothers], padded[:, fathers]]
+    founders = (mothers == len(mothers)) & (fathers == len(fathers))
+    factors[:, founders] = gene_table[genes[:, founders]]
+    return factors
+
+
+def enumerate_probabilities(people, probs, block_size=BLOCK_SIZE):
+    """
+    Return the same gene and trait probabilities as enumeration in
+    heredity.main, evaluating every assignment of genes in blocks of
+    `block_size` with array operations.
+
+    Every person's trait is either known, or summed over: the likelihood of
+    an unknown trait given the genes only adds to that person's trait
+    distribution, so assignments of unknown traits are never enumerated.
+    """
+    names, mothers, fathers, traits = encode(people)
+    gene_table, inherit_table, trait_table = model_tables(probs)
+    n = len(names)
+    known = traits >= 0
+    powers = 3 ** np.arange(n, dtype=np.int64)
+
+    gene_totals = np.zeros((n, 3))
+    trait_totals = np.zeros(n)
+    for start in range(0, 3 ** n, block_size):
+        # Row k holds the base-3 digits of assignment start + k
+        numbers = np.arange(start, min(start + block_size, 3 ** n), dtype=np.int64)
+        genes = numbers[:, np.newaxis] // powers % 3
+
+        factors = gene_factors(genes, mothers, fathers, gene_table, inherit_table)
+        factors[:, known] *= trait_table[genes[:, known], traits[known]]
+        p = factors.prod(axis=1)
+
+        for g in range(3):
+            gene_totals[:, g] += (genes == g).T.astype(np.float64) @ p
+        trait_totals += trait_table[genes, 1].T @ p
+
+    total = gene_totals[0].sum()
+    gene_totals /= total
+    trait_totals /= total
+    trait_totals[known] = traits[known]
+    return {
+        name: {
+            "gene": {g: float(gene_totals[i, g]) for g in (2, 1, 0)},
+            "trait": {
+                True: float(trait_totals[i]),
+                False: float(1 - trait_totals[i])
+            }
+        }
+        for i, name in enumerate(names)
+    }
@@ -0,0 +1,141 @@
+import argparse
+import multiprocessing
+import os
+import posixpath
+import re
+
+from edges import write_edges
+
+LINK = re.compile(rb"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+# The start of a link that is still open at the end of the text
+OPEN_LINK = re.compile(rb"<a\s[^>]*\Z|<a\s[^>]*?href=\"[^\"]*\Z|<a?\Z")
+CHUNK_SIZE = 1 << 16
+
+# Maps page names to their positions, set in each worker process
+worker_index = None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Crawl a directory tree of HTML pages into an edge list."
+    )
+    parser.add_argument("corpus")
+    parser.add_argument("output", help="file to write the edge list to")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of processes parsing pages"
+    )
+    args = parser.parse_args()
+
+    pages = find_pages(args.corpus)
+    write_edges(args.output, pages, crawl_links(args.corpus, pages, args.workers))
+    print(f"Wrote {len(pages)} pages to {args.output}.")
+
+
+def find_pages(directory):
+    """
+    Return the path of every HTML page under `directory`, relative to it
+    and with "/" separators, in a stable order.
+    """
+    pages = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        relative = os.path.relpath(root, directory)
+        for filename in sorted(files):
+            if filename.endswith(".html"):
+                page = os.path.normpath(os.path.join(relative, filename))
+                pages.append(page.replace(os.sep, "/"))
+    return pages
+
+
+def crawl_links(directory, pages, workers=1):
+    """
+    Yield, for each of `pages` under `directory` in order, the sorted
+    positions in `pages` of the other pages it links to.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    tasks = ((directory, page) for page in pages)
+    return map_pages(page_links, tasks, workers, index)
+
+
+def map_pages(function, tasks, workers=1, index=None):
+    """
+    Yield `function(task)` for each of `tasks` in order, computed by
+    `workers` processes in which `worker_index` is `index`.
+
+    Results are yielded as soon as they and those before them are ready.
+    """
+    if workers <= 1:
+        set_worker_index(index)
+        yield from map(function, tasks)
+        return
+    with multiprocessing.Pool(
+        workers, initializer=set_worker_index, initargs=(index,)
+    ) as pool:
+        yield from pool.imap(function, tasks, chunksize=64)
+
+
+def set_worker_index(index):
+    global worker_index
+    worker_index = index
+
+
+def page_links(task):
+    """
+    Return the sorted positions of the pages linked to by a page.
+    """
+    return sorted(
+        worker_index[target] for target in page_targets(*task)
+        if target in worker_index
+    )
+
+
+def page_targets(directory, page, digest=None):
+    """
+    Return the set of paths linked to by `page` under `directory`, other
+    than the page itself, updating `digest` with its contents if given.
+    """
+    folder = page.rpartition("/")[0]
+    targets = set()
+    for link in set(parse_links(os.path.join(directory, page), digest=digest)):
+        # Links are relative to the folder of the page they are on
+        target = f"{folder}/{link}" if folder else link
+        if "./" in target or target.startswith("/") or "//" in target:
+            target = posixpath.normpath(target)
+        if target != page:
+            targets.add(target)
+    return targets
+
+
+def parse_links(path, chunk_size=CHUNK_SIZE, digest=None):
+    """
+    Yield the target of every link in the HTML file at `path`,
+    reading it `chunk_size` bytes at a time and updating `digest`,
+    if given, with each chunk.
+    """
+    with open(path, "rb") as f:
+        rest = b""
+        while True:
+            chunk = f.read(chunk_size)
+            if digest is not None:
+                digest.update(chunk)
+            buffer = rest + chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                yield match[1].decode("utf-8", errors="replace")
+                end = match.end()
+            if not chunk:
+                return
+
+            # Keep a link that is still open at the end of the chunk, however
+            # long, since the rest of it is in the next chunk. Only its href
+            # can hold a ">", and only after the last quote, so it starts
+            # after the last ">" before that quote
+            quote = buffer.rfind(b'"', end)
+            closed = buffer.rfind(b">", end, quote if quote != -1 else len(buffer))
+            start = OPEN_LINK.search(buffer, max(end, closed + 1))
+            rest = buffer[start.start():] if start else b""
+
+
+if __name__ == "__main__":
+    main()
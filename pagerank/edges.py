@@ -0,0 +1,169 @@
+import functools
+import os
+import struct
+from array import array
+
+import numpy as np
+
+MAGIC = b"PRLINKS1"
+
+# Header is the magic string, the number of pages and links,
+# and the offset of the links from the start of the file
+HEADER = struct.Struct("<8sQQQ")
+
+# Number of integers to collect before writing them out
+BUFFER_SIZE = 1 << 20
+
+
+def write_edges(filename, pages, links):
+    """
+    Write a link graph to `filename` as a compact binary edge list, where
+    `pages` lists the page names and `links` yields, for each page in
+    order, an iterable of the positions in `pages` of the pages it links to.
+
+    The file holds the page names as a UTF-8 string table followed by every
+    link as a pair of little-endian 32-bit (source, target) positions,
+    here sorted by source. Links are written as they come, so the whole
+    graph never has to be held in memory.
+    """
+    if len(pages) >= 2 ** 32:
+        raise ValueError("an edge list can hold at most 2**32 - 1 pages")
+    write_pairs(filename, name_table(pages), pair_chunks(links))
+
+
+def pair_chunks(links):
+    """
+    Yield arrays of alternating sources and targets for the links of
+    each page in turn, a few million at a time.
+    """
+    pairs = array("I")
+    for source, targets in enumerate(links):
+        for target in sorted(set(targets)):
+            pairs.append(source)
+            pairs.append(target)
+        if len(pairs) >= BUFFER_SIZE:
+            yield pairs
+            pairs = array("I")
+    yield pairs
+
+
+def name_table(pages):
+    """
+    Return (offsets, data) for a list of page names, where name i is
+    data[offsets[i]:offsets[i + 1]] decoded as UTF-8.
+    """
+    data = bytearray()
+    offsets = [0]
+    for page in pages:
+        data += page.encode("utf-8")
+        offsets.append(len(data))
+    return np.array(offsets, dtype="<i8"), bytes(data)
+
+
+def write_pairs(filename, names, chunks):
+    """
+    Write an edge list to `filename` with the page names in the string
+    table `names` and links given by `chunks`, arrays of alternating
+    source and target positions, in the order they should be stored.
+    """
+    offsets, data = names
+    num_links = 0
+    with open(f"{filename}.tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0, 0))
+        f.write(np.asarray(offsets, dtype="<i8").tobytes())
+        f.write(data)
+        f.write(b"\0" * (aligned(f.tell()) - f.tell()))
+        links_offset = f.tell()
+
+        for chunk in chunks:
+            chunk = np.asarray(chunk).astype("<u4", copy=False)
+            f.write(chunk.tobytes())
+            num_links += chunk.size // 2
+
+        # Fill in the counts now that they are known
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, len(offsets) - 1, num_links, links_offset))
+
+    os.replace(f"{filename}.tmp", filename)
+
+
+class EdgeList():
+    """
+    Link graph read from a file written by `write_edges`.
+
+    Nothing but the header is read when the file is opened: page names and
+    links are memory-mapped, the links as an array of (source, target)
+    rows, so they can be streamed in chunks.
+    """
+
+    def __init__(self, filename):
+        with open(filename, "rb") as f:
+            magic, num_pages, num_links, links_offset = HEADER.unpack(
+                f.read(HEADER.size)
+            )
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a PageRank edge list")
+
+        self.num_pages = num_pages
+        self.name_offsets = mapped(filename, "<i8", HEADER.size, num_pages + 1)
+        self.name_data = mapped(
+            filename, "u1", HEADER.size + 8 * (num_pages + 1),
+            int(self.name_offsets[-1])
+        )
+        self.links = mapped(filename, "<u4", links_offset, (num_links, 2))
+
+    def __len__(self):
+        return self.num_pages
+
+    def page(self, i):
+        """
+        Return the name of page `i`.
+        """
+        start, end = self.name_offsets[i], self.name_offsets[i + 1]
+        return str(self.name_data[start:end].tobytes(), "utf-8")
+
+    @functools.cached_property
+    def pages(self):
+        """
+        List of the names of all pages.
+        """
+        data = self.name_data.tobytes()
+        offsets = self.name_offsets.tolist()
+        return [
+            str(data[offsets[i]:offsets[i + 1]], "utf-8")
+            for i in range(self.num_pages)
+        ]
+
+    def chunks(self, size=1 << 22):
+        """
+        Yield (sources, targets) arrays for up to `size` links at a time.
+        """
+        for start in range(0, len(self.links), size):
+            chunk = np.asarray(self.links[start:start + size], dtype=np.int64)
+            yield chunk[:, 0], chunk[:, 1]
+
+    def corpus(self):
+        """
+        Return the links as a dictionary mapping each page
+        to the set of pages it links to.
+        """
+        pages = self.pages
+        corpus = {page: set() for page in pages}
+        for sources, targets in self.chunks():
+            for source, target in zip(sources.tolist(), targets.tolist()):
+                corpus[pages[source]].add(pages[target])
+        return corpus
+
+
+def mapped(filename, dtype, offset, shape):
+    """
+    Return a read-only memory-mapped array of `shape` at `offset` in
+    `filename`, or an empty array if there is nothing to map.
+    """
+    if np.prod(shape) == 0:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+def aligned(position):
+    return (position + 7) & ~7
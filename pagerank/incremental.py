@@ -0,0 +1,186 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from crawler import find_pages, map_pages, page_targets
+from edges import EdgeList, write_edges
+from matrix import edge_matrix, power_iteration
+
+
+def update_pagerank(directory, state, damping_factor, tolerance, max_iterations,
+                    workers=1):
+    """
+    Return (ranks, changed, iterations) for the corpus in `directory`, where
+    `ranks` maps each page to its PageRank, `changed` is the number of pages
+    that are new or whose contents changed since the last update, and
+    `iterations` is the number of power iterations it took.
+
+    The link graph, ranks and file details of the last update are kept in
+    the `state` directory. Only pages whose size or modification time
+    changed are read again, and only those whose contents actually changed
+    count as changed. Power iteration starts from the previous ranks, so it
+    converges in a few iterations after small edits, and is skipped if
+    nothing changed and the ranks were saved with the same `damping_factor`
+    and `tolerance`.
+    """
+    os.makedirs(state, exist_ok=True)
+    pages = find_pages(directory)
+    old = load_state(state)
+    old_files = {} if old is None else old["files"]
+    settings = {"damping_factor": damping_factor, "tolerance": tolerance}
+
+    # Look for changes to the pages with a new size or modification time
+    files = {}
+    stale = []
+    for page in pages:
+        info = os.stat(os.path.join(directory, page))
+        files[page] = [info.st_mtime_ns, info.st_size, None]
+        previous = old_files.get(page)
+        if previous is not None and previous[:2] == files[page][:2]:
+            files[page][2] = previous[2]
+        else:
+            stale.append(page)
+    targets = {}
+    tasks = ((directory, page) for page in stale)
+    for page, (links, digest) in zip(stale, map_pages(hashed_targets, tasks, workers)):
+        files[page][2] = digest
+        if page not in old_files or old_files[page][2] != digest:
+            targets[page] = links
+
+    if (old is not None and not targets and pages == old["edges"].pages
+            and old["settings"] == settings):
+        save_state(state, files, old["missing"], settings)
+        ranks = old["ranks"]
+        return dict(zip(pages, ranks.tolist())), 0, 0
+
+    sources, links, missing = merge_links(pages, targets, old)
+    matrix, dangling = edge_matrix(len(pages), sources, links)
+
+    # Start from the old ranks, with new pages starting at 1 / N
+    start = np.full(len(pages), 1 / len(pages))
+    if old is not None:
+        index = {page: i for i, page in enumerate(pages)}
+        for k, page in enumerate(old["edges"].pages):
+            if page in index:
+                start[index[page]] = old["ranks"][k]
+    ranks, iterations = power_iteration(
+        matrix, dangling, damping_factor, tolerance, max_iterations, start
+    )
+
+    offsets = np.searchsorted(sources, np.arange(len(pages) + 1))
+    write_edges(
+        os.path.join(state, "links.bin"), pages,
+        (links[offsets[i]:offsets[i + 1]].tolist() for i in range(len(pages)))
+    )
+    with open(os.path.join(state, "ranks.npy.tmp"), "wb") as f:
+        np.save(f, ranks)
+    os.replace(
+        os.path.join(state, "ranks.npy.tmp"), os.path.join(state, "ranks.npy")
+    )
+    save_state(state, files, missing, settings)
+    return dict(zip(pages, ranks.tolist())), len(targets), iterations
+
+
+def hashed_targets(task):
+    """
+    Return (targets, digest) for a page: the sorted paths it links to,
+    and the SHA-256 digest of its contents.
+    """
+    directory, page = task
+    digest = hashlib.sha256()
+    targets = page_targets(directory, page, digest)
+    return sorted(targets), digest.hexdigest()
+
+
+def merge_links(pages, targets, old):
+    """
+    Return (sources, targets, missing) for the links between `pages`, given
+    the `targets` of every changed page and the `old` state for the rest.
+
+    Links are returned as arrays of positions in `pages`, sorted by source.
+    `missing` maps pages to the pages they link to that are not in the
+    corpus, so those links are restored if the pages are added later.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    sources = []
+    links = []
+    missing = {}
+
+    if old is not None:
+        # Keep the links of unchanged pages, to pages that are still there
+        old_pages = old["edges"].pages
+        position = np.array(
+            [index.get(page, -1) for page in old_pages], dtype=np.int64
+        )
+        unchanged = np.array(
+            [page in index and page not in targets for page in old_pages],
+            dtype=bool
+        )
+        for old_sources, old_targets in old["edges"].chunks():
+            kept = unchanged[old_sources]
+            new_sources = position[old_sources[kept]]
+            new_targets = position[old_targets[kept]]
+            found = new_targets >= 0
+            sources.append(new_sources[found])
+            links.append(new_targets[found])
+            for source, target in zip(
+                old_sources[kept][~found].tolist(), old_targets[kept][~found].tolist()
+            ):
+                missing.setdefault(old_pages[source], []).append(old_pages[target])
+
+    # Add the links of changed pages, and restore links from unchanged
+    # pages to pages that were missing and are back
+    new_sources = []
+    new_targets = []
+    linked = list(targets.items())
+    if old is not None:
+        linked.extend(
+            (page, page_missing) for page, page_missing in old["missing"].items()
+            if page in index and page not in targets
+        )
+    for page, page_links in linked:
+        for target in page_links:
+            if target in index:
+                new_sources.append(index[page])
+                new_targets.append(index[target])
+            elif target.endswith(".html"):
+                missing.setdefault(page, []).append(target)
+    sources.append(np.array(new_sources, dtype=np.int64))
+    links.append(np.array(new_targets, dtype=np.int64))
+
+    sources = np.concatenate(sources).astype(np.int64)
+    links = np.concatenate(links).astype(np.int64)
+    order = np.lexsort((links, sources))
+    return sources[order], links[order], missing
+
+
+def load_state(state):
+    """
+    Return the state saved in the `state` directory,
+    or None if there is none yet.
+    """
+    if not os.path.exists(os.path.join(state, "files.json")):
+        return None
+    with open(os.path.join(state, "files.json"), encoding="utf-8") as f:
+        saved = json.load(f)
+    return {
+        "edges": EdgeList(os.path.join(state, "links.bin")),
+        "ranks": np.load(os.path.join(state, "ranks.npy")),
+        "files": saved["files"],
+        "missing": saved["missing"],
+        "settings": saved.get("settings")
+    }
+
+
+def save_state(state, files, missing, settings):
+    """
+    Save the details of every file, the links to missing pages and the
+    `settings` the ranks were computed with to the `state` directory.
+    This is written last, once the links and ranks it describes are in place.
+    """
+    filename = os.path.join(state, "files.json")
+    with open(f"{filename}.tmp", "w", encoding="utf-8") as f:
+        json.dump({"files": files, "missing": missing, "settings": settings}, f)
+    os.replace(f"{filename}.tmp", filename)
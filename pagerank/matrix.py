@@ -0,0 +1,96 @@
+import numpy as np
+from scipy import sparse
+
+
+def link_matrix(corpus):
+    """
+    Return (pages, matrix, dangling) for a corpus of pages and their links.
+
+    `pages` lists the pages in the corpus, `matrix` is the sparse matrix
+    whose entry (i, j) is the probability of following a link from page j
+    to page i, and `dangling` marks the pages that have no links.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    sources = []
+    targets = []
+    for page, links in corpus.items():
+        for link in links:
+            # Ignore links to pages outside the corpus
+            if link in index:
+                sources.append(index[page])
+                targets.append(index[link])
+    matrix, dangling = edge_matrix(len(pages), sources, targets)
+    return pages, matrix, dangling
+
+
+def edge_matrix(n, sources, targets):
+    """
+    Return (matrix, dangling) for `n` pages with a link from page
+    sources[k] to page targets[k] for every k, given without duplicates.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    out_degree = np.bincount(sources, minlength=n)
+    matrix = sparse.csr_matrix(
+        (1 / out_degree[sources], (targets, sources)), shape=(n, n)
+    )
+    return matrix, out_degree == 0
+
+
+def teleport_matrix(pages, seed_sets):
+    """
+    Return an array with a column for each set of pages in `seed_sets`,
+    giving the probability of a random jump landing on each page when
+    jumps only land on pages in that set.
+    """
+    index = {page: i for i, page in enumerate(pages)}
+    teleport = np.zeros((len(pages), len(seed_sets)))
+    for k, seeds in enumerate(seed_sets):
+        positions = [index[page] for page in seeds if page in index]
+        if not positions:
+            raise ValueError(f"seed set {k} has no pages in the corpus")
+        teleport[positions, k] = 1 / len(positions)
+    return teleport
+
+
+def power_iteration(matrix, dangling, damping_factor, tolerance, max_iterations,
+                    start=None, teleport=None):
+    """
+    Return (ranks, iterations): the PageRank of every page as an array,
+    and how many iterations it took to compute.
+
+    Starting from equal ranks, or from the ranks in `start` if given,
+    repeatedly compute each page's rank from the ranks of the pages linking
+    to it, treating a page with no links as having one link to every page,
+    until no rank changes by `tolerance` or more, or `max_iterations` have
+    been done.
+
+    If `teleport` is given, random jumps, including those from pages with
+    no links, land on pages with the probabilities in `teleport` instead of
+    uniformly. Each column of a 2-D `teleport` gives one personalization,
+    and the ranks for all of them are computed together, one column each,
+    with one sparse matrix-matrix product per iteration.
+    """
+    n = matrix.shape[0]
+    jump = 1 / n if teleport is None else teleport
+    if start is None:
+        ranks = np.full(np.shape(jump) or n, 1 / n)
+    else:
+        ranks = start / start.sum(axis=0)
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        # Rank that follows links, then rank that jumps, whether at random
+        # or from a page with no links; updated in place to save copies
+        jumping = (1 - damping_factor) + damping_factor * ranks[dangling].sum(axis=0)
+        new = matrix @ ranks
+        new *= damping_factor
+        new += jumping * jump
+        new /= new.sum(axis=0)
+        ranks -= new
+        change = np.abs(ranks).max()
+        ranks = new
+        if change < tolerance:
+            break
+    return ranks, iterations
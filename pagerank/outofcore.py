@@ -0,0 +1,174 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from edges import EdgeList, write_pairs
+
+DAMPING = 0.85
+TOLERANCE = 0.001
+MAX_ITERATIONS = 1000
+
+# Number of links to hold in memory at a time
+CHUNK_SIZE = 1 << 22
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rank the pages of an edge list too large for memory."
+    )
+    parser.add_argument("edges", help="edge list written by crawler.py")
+    parser.add_argument(
+        "--sort", metavar="FILE",
+        help="first write the links sorted by target to FILE and rank from it"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE,
+        help="stop iterating once no rank changes by this much"
+    )
+    parser.add_argument(
+        "--max-iterations", type=int, default=MAX_ITERATIONS, metavar="N",
+        help="stop iterating after N updates"
+    )
+    parser.add_argument(
+        "--output", metavar="FILE",
+        help="save every rank, in page order, to FILE as a NumPy array"
+    )
+    parser.add_argument(
+        "--top", type=int, default=10, metavar="K",
+        help="print the K highest ranked pages"
+    )
+    args = parser.parse_args()
+
+    filename = args.edges
+    if args.sort:
+        print("Sorting links...")
+        sort_by_target(EdgeList(filename), args.sort)
+        filename = args.sort
+
+    edges = EdgeList(filename)
+    ranks, iterations = stream_pagerank(
+        edges, DAMPING, args.tolerance, args.max_iterations
+    )
+    if args.output:
+        np.save(args.output, ranks)
+    print(f"PageRank Results from Streaming ({iterations} iterations)")
+    top = np.argsort(ranks)[::-1][:args.top]
+    for i in top.tolist():
+        print(f"  {edges.page(i)}: {ranks[i]:.4f}")
+
+
+def stream_pagerank(edges, damping_factor, tolerance, max_iterations,
+                    chunk_size=CHUNK_SIZE):
+    """
+    Return (ranks, iterations) for the pages of an EdgeList by power
+    iteration, reading its links from disk `chunk_size` at a time in every
+    iteration, so only a few arrays with one number per page are held in
+    memory, never the links.
+
+    Links may be stored in any order, but each chunk only updates the ranks
+    between its lowest and highest target, so links sorted by target, as
+    written by `sort_by_target`, make every iteration much cheaper.
+    """
+    n = len(edges)
+    out_degree = np.zeros(n, dtype=np.int64)
+    for sources, _ in edges.chunks(chunk_size):
+        add_counts(out_degree, sources)
+    dangling = out_degree == 0
+
+    # Share of a page's rank that follows each of its links
+    share = np.zeros(n)
+    share[~dangling] = 1 / out_degree[~dangling]
+    del out_degree
+
+    ranks = np.full(n, 1 / n)
+    iterations = 0
+    while iterations < max_iterations:
+        iterations += 1
+        passed = ranks * share
+        new = np.zeros(n)
+        for sources, targets in edges.chunks(chunk_size):
+            add_counts(new, targets, passed[sources])
+        del passed
+
+        # Every page gets the rank that jumps at random or from pages
+        # with no links, as in matrix.power_iteration
+        new *= damping_factor
+        new += ((1 - damping_factor) + damping_factor * ranks[dangling].sum()) / n
+        new /= new.sum()
+        ranks -= new
+        change = np.abs(ranks).max()
+        ranks = new
+        if change < tolerance:
+            break
+    return ranks, iterations
+
+
+def add_counts(totals, positions, weights=None):
+    """
+    Add the `weights` (or 1) at each of `positions` to `totals`,
+    only touching the range of `totals` that the positions span.
+    """
+    if len(positions) == 0:
+        return
+    low = positions.min()
+    high = positions.max() + 1
+    totals[low:high] += np.bincount(positions - low, weights, minlength=high - low)
+
+
+def sort_by_target(edges, filename, chunk_size=CHUNK_SIZE):
+    """
+    Write the links of an EdgeList to `filename`, sorted by target and then
+    by source, holding no more than about `chunk_size` links in memory.
+
+    Links are first split by target range into temporary files of at most
+    `chunk_size` links each (unless a single page has more incoming links
+    than that), and then each file is sorted in memory and appended in turn.
+    """
+    in_degree = np.zeros(len(edges), dtype=np.int64)
+    for _, targets in edges.chunks(chunk_size):
+        add_counts(in_degree, targets)
+
+    # Choose target ranges that each hold at most chunk_size links
+    total = np.cumsum(in_degree)
+    bounds = [0]
+    while bounds[-1] < len(edges):
+        limit = (total[bounds[-1] - 1] if bounds[-1] else 0) + chunk_size
+        bounds.append(max(
+            int(np.searchsorted(total, limit, side="right")), bounds[-1] + 1
+        ))
+    bounds = np.array(bounds[1:-1], dtype=np.int64)
+
+    folder = os.path.dirname(os.path.abspath(filename))
+    with tempfile.TemporaryDirectory(dir=folder) as temporary:
+        buckets = [
+            open(os.path.join(temporary, str(k)), "wb")
+            for k in range(len(bounds) + 1)
+        ]
+        try:
+            for sources, targets in edges.chunks(chunk_size):
+                bucket = np.searchsorted(bounds, targets, side="right")
+                order = np.argsort(bucket, kind="stable")
+                pairs = np.column_stack((sources, targets))[order].astype("<u4")
+                splits = np.searchsorted(bucket[order], np.arange(1, len(buckets)))
+                for f, part in zip(buckets, np.split(pairs, splits)):
+                    f.write(part.tobytes())
+        finally:
+            for f in buckets:
+                f.close()
+
+        def sorted_buckets():
+            for k in range(len(buckets)):
+                pairs = np.fromfile(
+                    os.path.join(temporary, str(k)), dtype="<u4"
+                ).reshape(-1, 2)
+                yield pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]
+
+        write_pairs(
+            filename, (edges.name_offsets, edges.name_data), sorted_buckets()
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,122 @@
-import os
+import argparse
 import random
-import re
-import sys
+
+from crawler import crawl_links, find_pages
+from incremental import update_pagerank
+from matrix import link_matrix, power_iteration, teleport_matrix
+from sampling import link_lists, parallel_sample, walk
 
 DAMPING = 0.85
 SAMPLES = 10000
+TOLERANCE = 0.001
+MAX_ITERATIONS = 1000
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
-    print(f"PageRank Results from Sampling (n = {SAMPLES})")
+    parser = argparse.ArgumentParser(description="Rank the pages of a corpus.")
+    parser.add_argument("corpus")
+    parser.add_argument(
+        "--samples", type=int, default=SAMPLES, metavar="N",
+        help="number of pages to sample"
+    )
+    parser.add_argument(
+        "--walkers", type=int, default=1, metavar="W",
+        help="split the samples between W independent surfers run in parallel"
+    )
+    parser.add_argument(
+        "--seed", type=int,
+        help="seed the random surfers so that results can be reproduced"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=TOLERANCE,
+        help="stop iterating once no rank changes by this much"
+    )
+    parser.add_argument(
+        "--max-iterations", type=int, default=MAX_ITERATIONS, metavar="N",
+        help="stop iterating after N updates"
+    )
+    parser.add_argument(
+        "--state", metavar="DIR",
+        help="only reparse changed pages and start from the ranks saved in DIR"
+    )
+    parser.add_argument(
+        "--seeds", metavar="PAGES", action="append", default=[],
+        help="also rank pages with random jumps only to these comma-separated pages"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="number of processes parsing pages"
+    )
+    args = parser.parse_args()
+    if args.walkers > args.samples:
+        parser.error("--walkers cannot be more than --samples")
+
+    if args.state:
+        # Only the ranks from iteration are kept up to date
+        if (args.samples != SAMPLES or args.walkers != 1
+                or args.seed is not None or args.seeds):
+            parser.error(
+                "--state cannot be used with --samples, --walkers, --seed or --seeds"
+            )
+        ranks, changed, iterations = update_pagerank(
+            args.corpus, args.state, DAMPING, args.tolerance, args.max_iterations,
+            args.workers
+        )
+        print(f"PageRank Results from Iteration "
+              f"({changed} pages changed, {iterations} iterations)")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+        return
+
+    corpus = crawl(args.corpus, args.workers)
+    seed_sets = [[page for page in seeds.split(",") if page] for seeds in args.seeds]
+    for seeds in seed_sets:
+        unknown = [page for page in seeds if page not in corpus]
+        if unknown:
+            parser.error(f"--seeds: not in corpus: {', '.join(unknown)}")
+        if not seeds:
+            parser.error("--seeds: no pages given")
+
+    if args.walkers > 1:
+        ranks, error = parallel_sample(
+            corpus, DAMPING, args.samples, args.walkers, args.seed
+        )
+    else:
+        random.seed(args.seed)
+        ranks = sample_pagerank(corpus, DAMPING, args.samples)
+    print(f"PageRank Results from Sampling (n = {args.samples})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
+    if args.walkers > 1:
+        print(f"Largest standard error: {error:.4f}")
+    ranks = iterate_pagerank(corpus, DAMPING, args.tolerance, args.max_iterations)
     print(f"PageRank Results from Iteration")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
+    if seed_sets:
+        for seeds, ranks in zip(args.seeds, personalized_pagerank(
+            corpus, DAMPING, seed_sets, args.tolerance, args.max_iterations
+        )):
+            print(f"PageRank Results Personalized to {seeds}")
+            for page in sorted(ranks):
+                print(f"  {page}: {ranks[page]:.4f}")
+
 
-def crawl(directory):
+def crawl(directory, workers=1):
     """
-    Parse a directory of HTML pages and check for links to other pages.
+    Parse a directory tree of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
-
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
-
-    # Only include links to other pages in the corpus
-    for filename in pages:
-        pages[filename] = set(
-            link for link in pages[filename]
-            if link in pages
-        )
 
-    return pages
+    Pages are parsed by `workers` processes.
+    """
+    # Parse pages as a stream of links, keeping only those to other pages
+    pages = find_pages(directory)
+    return {
+        page: {pages[i] for i in links}
+        for page, links in zip(pages, crawl_links(directory, pages, workers))
+    }
 
 
 def transition_model(corpus, page, damping_factor):
@@ -62,7 +133,7 @@ def transition_model(corpus, page, damping_factor):
     # Initialize empty dictionary
     dictionary = dict()
     # If page contains links
-    if links is not None:
+    if links:
         #With probability `damping_factor`, choose a link at random linked to by `page`.
         p = damping_factor/len(links)
         # With probability `1 - damping_factor`, choose a link at random chosen from all pages in the corpus.
@@ -90,23 +161,13 @@ def sample_pagerank(corpus, damping_factor, n):
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    # Initialize dictionary where each key is a page in the corpus
-    pageranks = {page: 0 for page in corpus}
-    click = 1/n
-    # Randomly choose a page from the corpus as the first sample. 
-    page = random.choice(list(corpus))
-    pageranks[page] += click
-    # Iterate n times
-    for _ in range(1,n):
-        # Update for each iteration
-        model = transition_model(corpus, page, damping_factor)
-        # Click on page given available links and the probabaility distributions
-        page = random.choices(list(model.keys()), list(model.values()), k=1)[0]
-        # Add a click to the pageranks dictionary
-        pageranks[page] += click
-    return pageranks
-
-def iterate_pagerank(corpus, damping_factor):
+    pages, links = link_lists(corpus)
+    counts = walk(links, damping_factor, n, random)
+    return {page: count / n for page, count in zip(pages, counts)}
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE,
+                     max_iterations=MAX_ITERATIONS):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -114,41 +175,38 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Iteration stops once no value changes by `tolerance` or more,
+    or after `max_iterations` updates.
+    """
+    # Store links as a sparse matrix so each update only visits actual links
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks, _ = power_iteration(
+        matrix, dangling, damping_factor, tolerance, max_iterations
+    )
+    return {page: float(rank) for page, rank in zip(pages, ranks)}
+
+
+def personalized_pagerank(corpus, damping_factor, seed_sets, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS):
+    """
+    Return a list with a dictionary of PageRank values for each set of
+    pages in `seed_sets`, where random jumps only land on pages in the set,
+    such as one user's bookmarks or the pages on one topic.
+
+    All the rankings are computed together, so a batch of them costs about
+    as many iterations as a single one.
     """
-    N = len(corpus)
-    # Initialize dict where each page in corpus has p = 1/N
-    PR = {page: (1/N) for page in corpus}
-    new = {page: 0 for page in corpus}
-    rand = (1-damping_factor)/N
-    change = 1
-    # Keep iterating until changes are less than 0.001
-    while change >= 0.001:
-        # Iterate through corpus
-        for page in corpus.keys():
-            summation = 0
-            # Iterate through other pages in corpus
-            for prev_page in corpus.keys():
-                # A page with no links = page with 1 link to each page in corpus
-                if len(corpus[prev_page]) == 0:
-                    summation = 1/N
-                # If the prev_page has a link to current page:
-                elif page in corpus[prev_page]:
-                    summation += (PR[prev_page]/len(corpus[prev_page]))
-            p = rand + (damping_factor*summation)
-            new[page] = p
-        # Normalize values
-        norm_factor = sum(new.values())
-        new = {page: (rank / norm_factor) for page, rank in new.items()}
-        # Calculate the largest change in value
-        max = 0
-        for _ in new:
-            change = abs(new[page] - PR[page])
-            if change > max:
-                max = change
-        # Update PR
-        PR = new
-
-    return PR            
+    pages, matrix, dangling = link_matrix(corpus)
+    ranks, _ = power_iteration(
+        matrix, dangling, damping_factor, tolerance, max_iterations,
+        teleport=teleport_matrix(pages, seed_sets)
+    )
+    return [
+        {page: float(rank) for page, rank in zip(pages, column)}
+        for column in ranks.T
+    ]
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,101 @@
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+# Links of the corpus being sampled, set in each worker process
+worker_links = None
+
+
+def link_lists(corpus):
+    """
+    Return (pages, links) for `corpus`, where `pages` lists the pages and
+    links[i] lists the positions in `pages` of the pages linked to by page i.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    # Sort links so that seeded walks do not depend on the order of sets
+    links = [
+        sorted(index[link] for link in corpus[page] if link in index)
+        for page in pages
+    ]
+    return pages, links
+
+
+def walk(links, damping_factor, n, rng):
+    """
+    Return how many times a random surfer visits each page in `n` steps,
+    starting from a page chosen at random, where links[i] lists the pages
+    linked to by page i and `rng` is the source of random numbers.
+
+    Rather than building the transition model for every step, decide
+    directly whether to follow a link, then pick the link or the page
+    uniformly, so every step takes constant time.
+    """
+    counts = [0] * len(links)
+    page = rng.randrange(len(links))
+    for _ in range(n):
+        counts[page] += 1
+        page_links = links[page]
+        if page_links and rng.random() < damping_factor:
+            page = page_links[rng.randrange(len(page_links))]
+        else:
+            # Pages with no links lead to every page with equal probability
+            page = rng.randrange(len(links))
+    return counts
+
+
+def parallel_sample(corpus, damping_factor, n, walkers, seed=None, processes=None):
+    """
+    Return (ranks, error): PageRank values for each page estimated from `n`
+    samples split between `walkers` independent random surfers, run across
+    `processes` worker processes (by default one per CPU).
+
+    Every surfer gets its own stream of random numbers derived from `seed`,
+    so results are reproducible for a given seed and number of walkers.
+    `error` is the largest standard error of any page's estimate, computed
+    from how much the surfers' estimates vary, and shrinks as `n` grows.
+    """
+    if walkers < 2:
+        raise ValueError("at least two walkers are needed to estimate the error")
+    if n < walkers:
+        raise ValueError("every walker needs at least one sample")
+    pages, links = link_lists(corpus)
+    seeds = [
+        int(stream.generate_state(1)[0])
+        for stream in np.random.SeedSequence(seed).spawn(walkers)
+    ]
+    tasks = [
+        (damping_factor, n // walkers + (k < n % walkers), seeds[k])
+        for k in range(walkers)
+    ]
+
+    processes = min(processes or os.cpu_count(), walkers)
+    if processes > 1:
+        with multiprocessing.Pool(
+            processes, initializer=set_worker_links, initargs=(links,)
+        ) as pool:
+            counts = pool.map(walk_task, tasks)
+    else:
+        set_worker_links(links)
+        counts = [walk_task(task) for task in tasks]
+
+    counts = np.array(counts, dtype=np.float64)
+    steps = np.array([task[1] for task in tasks], dtype=np.float64)
+    ranks = counts.sum(axis=0) / n
+
+    # Each surfer's estimate is an independent sample of the rank
+    estimates = counts / steps[:, np.newaxis]
+    error = float((estimates.std(axis=0, ddof=1) / np.sqrt(walkers)).max())
+    return {page: float(rank) for page, rank in zip(pages, ranks)}, error
+
+
+def set_worker_links(links):
+    global worker_links
+    worker_links = links
+
+
+def walk_task(task):
+    damping_factor, n, seed = task
+    return walk(worker_links, damping_factor, n, random.Random(seed))
@@ -0,0 +1,31 @@
+from crawler import CHUNK_SIZE, parse_links
+
+
+def test_long_link_across_chunks(tmp_path):
+    """
+    A link longer than the text carried between chunks is found wherever
+    the chunk boundary falls in it.
+    """
+    path = tmp_path / "1.html"
+    link = b'<a style="' + b"x" * 9500 + b'" href="2.html">2</a>'
+    for offset in range(-len(link), 1, 500):
+        padding = b"<p>" + b"y" * (CHUNK_SIZE + offset) + b"</p>"
+        path.write_bytes(padding + link + b"<p>z</p>" + padding)
+        assert list(parse_links(path)) == ["2.html"]
+        assert list(parse_links(path, chunk_size=1 << 20)) == ["2.html"]
+
+
+def test_stray_brackets_across_chunks(tmp_path):
+    """
+    Stray "<" and ">", including a ">" inside an href, do not change the
+    links found when the file is read in small chunks.
+    """
+    path = tmp_path / "1.html"
+    path.write_bytes(
+        b'<script>if (a < b) x = "<";</script><a  href="2.html">'
+        b'<a title="1 < 2"\nhref="a>b.html">< a href="3.html"><a'
+    )
+    links = list(parse_links(path, chunk_size=1 << 20))
+    assert links == ["2.html", "a>b.html"]
+    for chunk_size in range(1, 20):
+        assert list(parse_links(path, chunk_size)) == links